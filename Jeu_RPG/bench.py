@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+# --- BENCHMARK SANS FENETRE ---
+# Rejoue un script d'entrees fixe dans Game.step pour chaque ecran et mesure
+# le temps par frame (FPS, p50/p99), les appels de dessin et les allocations Python par frame.
+# Usage : python bench.py [--frames 600] [--out resultats.json] [--compare base.json]
+os.environ["RPG_HEADLESS"] = "1"
+os.environ.setdefault("RPG_IDLE", "0")
+
+import pygame
+import core
+import jeu20 as J
+
+STATES = ["MENU", "CAMP", "INVENTORY", "MERCHANT", "COMBAT"]
+
+def motion(pos):
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+def click(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+def wheel(y):
+    return pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=y, flipped=False)
+
+def make_player(job_class="Guerrier"):
+    return core.new_hero("Bench", job_class)
+
+# --- SCENARIOS ---
+# Chaque scenario prepare une partie puis donne, frame par frame, (evenements, position souris).
+# Le survol balaie les boutons de l'ecran pour forcer hover + rendu du texte.
+def sweep(points):
+    def script(i):
+        pos = points[i % len(points)]
+        return [motion(pos)], pos
+    return script
+
+def setup_menu(g):
+    return sweep([(400, 225), (400, 295), (400, 365), (100, 100)])
+
+def setup_camp(g):
+    g.player = make_player()
+    g.state = "CAMP"
+    return sweep([(150, 475), (380, 475), (345, 405), (460, 405), (675, 405), (610, 475), (760, 30), (400, 300)])
+
+def setup_list(state, n_items, wheel_period):
+    def setup(g):
+        g.player = make_player()
+        g.player.gold = 500
+        # Objets tous differents (prix propre a chacun) pour avoir n_items piles donc n_items entrees
+        catalog = core.POSSIBLE_EQUIPMENT + core.MERCHANT_GEAR
+        g.player.inventory.clear()
+        for i in range(n_items): g.player.inventory.add(core.new_item(catalog[i % len(catalog)], price=i))
+        g.state = state
+        hover = sweep([(160, 140), (400, 140), (640, 240), (160, 340), (400, 440)])
+        def script(i):
+            events, pos = hover(i)
+            # Descend puis remonte la liste par crans de molette
+            if i % wheel_period == 0:
+                events.append(wheel(-1 if (i // (wheel_period * 40)) % 2 == 0 else 1))
+            return events, pos
+        return script
+    return setup
+
+def setup_combat(g):
+    g.player = make_player()
+    g.player.base_max_hp = g.player.hp = 10 ** 9
+    g.player.invalidate_stats()
+    g.spawn_enemy()
+    g.enemy.hp = 10 ** 9
+    g.state = "COMBAT"
+    attack = (300, 480)
+    def script(i):
+        # Une attaque toutes les 10 frames : journal et PV changent, le reste est du survol
+        if i % 10 == 0: return [motion(attack), click(attack)], attack
+        pos = (510, 480) if i % 2 else attack
+        return [motion(pos)], pos
+    return script
+
+SCENARIOS = {
+    "MENU": setup_menu,
+    "CAMP": setup_camp,
+    "INVENTORY": setup_list("INVENTORY", 500, 3),
+    "MERCHANT": setup_list("MERCHANT", 2, 3),
+    "COMBAT": setup_combat,
+}
+
+# --- MESURES ---
+def percentile(values, pct):
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+def run_frames(g, script, start, count, on_frame=None):
+    for i in range(start, start + count):
+        events, pos = script(i)
+        events = pygame.event.get() + events
+        if on_frame: on_frame(i, g, events, pos)
+        else: g.step(events, pos)
+
+def bench_state(state, frames, warmup, dirty, seed):
+    random.seed(seed)
+    J.RENDERER.set_dirty_mode(dirty)
+    J.RENDERER.invalidate()
+    g = J.Game()
+    g.idle_mode = False
+    script = SCENARIOS[state](g)
+    run_frames(g, script, 0, warmup)
+
+    # 1. Temps par frame (sans tracemalloc, qui fausserait les mesures) et appels de dessin reels
+    times = []; draw_calls = []
+    def timed(i, g, events, pos):
+        t0 = time.perf_counter()
+        g.step(events, pos)
+        times.append(time.perf_counter() - t0)
+        draw_calls.append(J.RENDERER.draw_calls)
+    run_frames(g, script, warmup, frames, timed)
+
+    # 2. Allocations : memoire Python max par frame et blocs conserves
+    peaks = []; blocks = []
+    b0 = sys.getallocatedblocks(); overhead = sys.getallocatedblocks() - b0  # l'entier retourne compte
+    def traced(i, g, events, pos):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        b0 = sys.getallocatedblocks()
+        g.step(events, pos)
+        blocks.append(sys.getallocatedblocks() - b0 - overhead)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.start()
+    try: run_frames(g, script, warmup + frames, frames, traced)
+    finally: tracemalloc.stop()
+
+    total = sum(times)
+    return {
+        "frames": frames,
+        "fps": round(frames / total, 1) if total else None,
+        "mean_ms": round(total / frames * 1000, 3),
+        "p50_ms": round(percentile(times, 50) * 1000, 3),
+        "p99_ms": round(percentile(times, 99) * 1000, 3),
+        "max_ms": round(max(times) * 1000, 3),
+        "draw_calls_per_frame": round(sum(draw_calls) / len(draw_calls), 2),
+        "alloc_peak_kib_per_frame": round(sum(peaks) / len(peaks) / 1024, 2),
+        "net_blocks_per_frame": round(sum(blocks) / len(blocks), 2),
+        "final_state": g.state,
+    }
+
+def compare(results, baseline_path, max_regression):
+    with open(baseline_path, 'r') as f: baseline = json.load(f)["states"]
+    failures = []
+    for state, res in results.items():
+        base = baseline.get(state)
+        if not base or not base.get("fps"): continue
+        drop = 1 - res["fps"] / base["fps"]
+        if drop > max_regression:
+            failures.append(f"{state}: {base['fps']} -> {res['fps']} FPS (-{drop:.0%})")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sans fenetre de jeu20.py")
+    parser.add_argument("--frames", type=int, default=600, help="frames mesurees par ecran")
+    parser.add_argument("--warmup", type=int, default=60, help="frames ignorees avant la mesure")
+    parser.add_argument("--states", nargs="+", default=STATES, choices=STATES)
+    parser.add_argument("--dirty", action="store_true", help="active le rendu partiel (RPG_DIRTY_RECTS)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="ecrit le JSON dans ce fichier (sinon sortie standard)")
+    parser.add_argument("--compare", help="JSON de reference : echoue si le FPS baisse trop")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="baisse de FPS toleree (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    # Les scenarios ne doivent jamais toucher aux vraies sauvegardes
+    J.SAVES_DIR = tempfile.mkdtemp(prefix="rpg_bench_")
+
+    results = {state: bench_state(state, args.frames, args.warmup, args.dirty, args.seed) for state in args.states}
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "pygame": pygame.version.ver,
+            "video_driver": pygame.display.get_driver(),
+            "dirty_rects": args.dirty,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "states": results,
+    }
+    text = json.dumps(report, indent=4)
+    if args.out:
+        with open(args.out, 'w') as f: f.write(text)
+    else: print(text)
+
+    if args.compare:
+        failures = compare(results, args.compare, args.max_regression)
+        for msg in failures: print(f"[REGRESSION] {msg}", file=sys.stderr)
+        if failures: return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
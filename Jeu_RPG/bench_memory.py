@@ -0,0 +1,81 @@
+import sys
+import json
+import argparse
+import tracemalloc
+
+# --- BENCHMARK MEMOIRE DES OBJETS ---
+# Compare, pour un inventaire de N objets, la memoire occupee par :
+#   dicts     : une copie de dict par objet (ancien format)
+#   items     : une instance Item/Equipment (__slots__) par objet
+#   catalogue : les instances partagees du catalogue (poids-mouche, cas du jeu)
+# ainsi que la taille de la sauvegarde JSON correspondante.
+# Usage : python bench_memory.py [--items 100000] [--modified 0.1]
+import core
+
+def measure(build):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        inventory = build()
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return inventory, used
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memoire par objet : dicts contre Item/Equipment")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--modified", type=float, default=0.1,
+                        help="part d'objets modifies (prix/bonus du marchand) qui ont leur propre instance")
+    parser.add_argument("--out", help="ecrit le JSON dans ce fichier (sinon sortie standard)")
+    args = parser.parse_args(argv)
+
+    tables = core.POSSIBLE_CONSUMABLES + core.POSSIBLE_EQUIPMENT + core.MERCHANT_GEAR
+    every = int(1 / args.modified) if args.modified > 0 else 0
+
+    # Meme contenu pour les trois representations : un objet sur `every` a un prix de marchand
+    def source(i):
+        data = tables[i % len(tables)]
+        if every and i % every == 0: return data, {"price": data["base_price"] * 2}
+        return data, {}
+
+    def build_dicts():
+        return [dict(data, **deltas) for data, deltas in map(source, range(args.items))]
+
+    def build_items():
+        return [core.Item.from_dict(core.ITEM_IDS[data["name"]], dict(data, **deltas))
+                for data, deltas in map(source, range(args.items))]
+
+    def build_catalog():
+        return [core.new_item(data, **deltas) for data, deltas in map(source, range(args.items))]
+
+    results = {}
+    saves = {}
+    for name, build in (("dicts", build_dicts), ("items", build_items), ("catalogue", build_catalog)):
+        inventory, used = measure(build)
+        if name == "dicts": save = json.dumps(inventory)
+        else: save = json.dumps([item.to_save() for item in inventory])
+        results[name] = {
+            "bytes": used,
+            "bytes_per_item": round(used / args.items, 1),
+            "distinct_objects": len({id(item) for item in inventory}),
+            "save_bytes": len(save),
+        }
+        saves[name] = inventory
+        del inventory
+
+    # Les trois representations doivent decrire exactement les memes objets
+    as_dicts = [item.to_dict() for item in saves["catalogue"]]
+    assert as_dicts == [item.to_dict() for item in saves["items"]]
+    assert as_dicts == [core.normalize_item(d) for d in saves["dicts"]]
+
+    base = results["dicts"]["bytes"]
+    for res in results.values(): res["ratio_vs_dicts"] = round(res["bytes"] / base, 3) if base else None
+    report = {"items": args.items, "modified": args.modified, "python": sys.version.split()[0], "results": results}
+    text = json.dumps(report, indent=4)
+    if args.out:
+        with open(args.out, 'w') as f: f.write(text)
+    else: print(text)
+
+if __name__ == "__main__":
+    main()
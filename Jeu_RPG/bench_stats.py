@@ -0,0 +1,90 @@
+import sys
+import json
+import time
+import random
+import argparse
+
+# --- BENCHMARK DES STATS EN COLONNES ---
+# Applique les memes soins et degats a N heros dans un StatStore (array) et un
+# NumpyStatStore, verifie que les deux donnent les memes resultats ligne par
+# ligne (toutes les lignes, puis un sous-ensemble) et mesure le temps par tour.
+# Usage : python bench_stats.py [--heroes 100000] [--turns 20]
+import core
+
+def fill(store, n, seed):
+    rng = random.Random(seed)
+    for _ in range(n):
+        job_class = rng.choice(list(core.CLASS_STATS))
+        hp, atk, defense = core.CLASS_STATS[job_class]
+        row = store.add(hp, atk, defense, hp=rng.randint(1, hp))
+        store.set_bonus(row, rng.randint(0, 40), rng.randint(0, 25), rng.randint(-2, 30))
+
+def as_list(values): return [int(v) for v in values]
+
+def check_damage(store, dmg, rows, dealt, blocked):
+    # Les tirages different (random / numpy.random) : chaque coup doit suivre la regle de son tirage
+    for i, r in enumerate(store.rows(rows) if rows is not None else range(len(store))):
+        defense = store.stats(r)[2]
+        reduced = max(0, dmg - (defense // 2))
+        assert dealt[i] == (reduced // 2 if blocked[i] else reduced), f"ligne {r} : {dealt[i]} != regle"
+        assert not blocked[i] or core.block_threshold(defense) > 0, f"ligne {r} : parade impossible"
+
+def compare(stores, n, turns):
+    # Meme sequence d'operations sur les deux stockages -> memes PV a chaque etape
+    plain, vec = stores
+    np = core.numpy_module()
+    subset = list(range(0, n, 3))
+    for rows in (None, subset):
+        vec_rows = None if rows is None else np.array(rows)
+        for t in range(turns):
+            healed = (as_list(plain.heal(7, rows)), as_list(vec.heal(7, vec_rows)))
+            assert healed[0] == healed[1], f"heal(rows={'tous' if rows is None else 'partiel'}) : PV rendus differents"
+            dmg = 10 + t
+            dealt, blocked = vec.take_damage(dmg, vec_rows, np.random.default_rng(t))
+            check_damage(vec, dmg, rows, as_list(dealt), list(blocked))
+            # Le store array subit exactement les memes degats (tirages du NumPy)
+            for i, r in enumerate(rows if rows is not None else range(n)): plain.cols["hp"][r] -= int(dealt[i])
+            assert as_list(plain.column("hp")) == as_list(vec.column("hp")), "PV differents apres take_damage"
+        assert plain.alive(rows) == list(vec.alive(vec_rows))
+        assert as_list(plain.max_hp(rows)) == as_list(vec.max_hp(vec_rows))
+
+def timed(store, turns, rng):
+    t0 = time.perf_counter()
+    for _ in range(turns):
+        store.take_damage(12, rng=rng)
+        store.heal(5)
+    return (time.perf_counter() - t0) / turns
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StatStore (array) contre NumpyStatStore : resultats et vitesse")
+    parser.add_argument("--heroes", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="ecrit le JSON dans ce fichier (sinon sortie standard)")
+    args = parser.parse_args(argv)
+
+    np = core.numpy_module()
+    if np is None: raise SystemExit("bench_stats.py demande NumPy")
+
+    # 1. Les deux stockages doivent donner les memes resultats (petit echantillon)
+    small = (core.StatStore(), core.NumpyStatStore(4))
+    for store in small: fill(store, 300, args.seed)
+    compare(small, 300, 10)
+
+    # 2. Temps par tour (un coup + un soin pour chaque heros)
+    results = {}
+    for name, store, rng in (("array", core.StatStore(), random.Random(args.seed)),
+                             ("numpy", core.NumpyStatStore(args.heroes), np.random.default_rng(args.seed))):
+        fill(store, args.heroes, args.seed)
+        results[name] = {"ms_per_turn": round(timed(store, args.turns, rng) * 1000, 3)}
+    base = results["array"]["ms_per_turn"]
+    for res in results.values(): res["speedup_vs_array"] = round(base / res["ms_per_turn"], 1) if res["ms_per_turn"] else None
+    report = {"heroes": args.heroes, "turns": args.turns, "python": sys.version.split()[0],
+              "numpy": np.__version__, "checked": True, "results": results}
+    text = json.dumps(report, indent=4)
+    if args.out:
+        with open(args.out, 'w') as f: f.write(text)
+    else: print(text)
+
+if __name__ == "__main__":
+    main()
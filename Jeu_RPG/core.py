@@ -0,0 +1,1096 @@
+import os
+import time
+import random
+from array import array
+from collections import OrderedDict
+
+# --- REGLES DU JEU (sans pygame) ---
+# Donnees, objets, personnages, combat, butin, marchand et etages. Ce module
+# n'importe ni pygame ni NumPy : simulations, benchmarks et validation cote
+# serveur l'importent sans ouvrir de fenetre. jeu20.py n'est qu'une interface
+# par-dessus (ecrans, boutons, sauvegardes sur disque).
+
+np = None  # NumPy (optionnel), importe seulement par les simulations : voir numpy_module()
+
+# --- BASES DE DONNÉES ---
+POSSIBLE_CONSUMABLES = [
+    {"name": "Potion Soin (15)", "type": "heal", "val": 15, "desc": "Rend 15 PV", "cat": "consommable", "base_price": 20},
+    {"name": "Grde Potion (30)", "type": "heal", "val": 30, "desc": "Rend 30 PV", "cat": "consommable", "base_price": 45},
+    {"name": "Elixir Force (+2)", "type": "atk", "val": 2, "desc": "+2 Base Atk", "cat": "consommable", "base_price": 60},
+    {"name": "Peau Pierre (+2)", "type": "def", "val": 2, "desc": "+2 Base Def", "cat": "consommable", "base_price": 60}
+]
+
+POSSIBLE_EQUIPMENT = [
+    {"name": "Epee Rouillee", "cat": "equipment", "slot": "weapon", "atk": 5, "def": 0, "hp": 0, "desc": "+5 ATK", "base_price": 10},
+    {"name": "Hache Guerre", "cat": "equipment", "slot": "weapon", "atk": 12, "def": -2, "hp": 0, "desc": "+12 ATK/-2 DEF", "base_price": 30},
+    {"name": "Casque Cuir", "cat": "equipment", "slot": "head", "atk": 0, "def": 3, "hp": 0, "desc": "+3 DEF", "base_price": 15},
+    {"name": "Heaume Acier", "cat": "equipment", "slot": "head", "atk": 0, "def": 6, "hp": 0, "desc": "+6 DEF", "base_price": 40},
+    {"name": "Tunique Tissu", "cat": "equipment", "slot": "chest", "atk": 0, "def": 2, "hp": 20, "desc": "+2 DEF/+20 HP", "base_price": 25},
+    {"name": "Cotte Mailles", "cat": "equipment", "slot": "chest", "atk": 0, "def": 10, "hp": 10, "desc": "+10 DEF/+10 HP", "base_price": 55},
+    {"name": "Jambieres Cuir", "cat": "equipment", "slot": "legs", "atk": 0, "def": 4, "hp": 0, "desc": "+4 DEF", "base_price": 20},
+    {"name": "Bottes Marche", "cat": "equipment", "slot": "feet", "atk": 0, "def": 2, "hp": 0, "desc": "+2 DEF", "base_price": 10},
+    {"name": "Anneau Vie", "cat": "equipment", "slot": "ring", "atk": 0, "def": 0, "hp": 40, "desc": "+40 HP", "base_price": 80},
+    {"name": "Anneau Rage", "cat": "equipment", "slot": "ring", "atk": 5, "def": 0, "hp": 0, "desc": "+5 ATK", "base_price": 70}
+]
+
+MERCHANT_GEAR = [
+    {"name": "Katana Aiguise", "cat": "equipment", "slot": "weapon", "atk": 18, "def": 0, "hp": 0, "desc": "+18 ATK", "base_price": 120},
+    {"name": "Masse d'Or", "cat": "equipment", "slot": "weapon", "atk": 14, "def": 2, "hp": 0, "desc": "+14 ATK/+2 DEF", "base_price": 110},
+    {"name": "Plastron Dore", "cat": "equipment", "slot": "chest", "atk": 0, "def": 15, "hp": 30, "desc": "+15 DEF/+30 HP", "base_price": 150},
+    {"name": "Bottes Vitesse", "cat": "equipment", "slot": "feet", "atk": 2, "def": 4, "hp": 0, "desc": "+2 ATK/+4 DEF", "base_price": 90},
+    {"name": "Casque Royal", "cat": "equipment", "slot": "head", "atk": 0, "def": 9, "hp": 10, "desc": "+9 DEF/+10 HP", "base_price": 130}
+]
+
+BOSS_LOOT = [
+    {"name": "Grde Potion (30)", "type": "heal", "val": 30, "desc": "Rend 30 PV", "cat": "consommable"},
+    {"name": "Epee Legendaire", "cat": "equipment", "slot": "weapon", "atk": 25, "def": 5, "hp": 0, "desc": "+25 ATK/+5 DEF"}
+]
+
+FLOOR_ENEMIES = {
+    1: [("Gobelin", 30, 8, 0), ("Rat Geant", 25, 6, 0)],
+    2: [("Orc", 50, 12, 2), ("Gobelin Elite", 45, 11, 2)],
+    3: [("Orc Guerrier", 70, 15, 4), ("Orc Mage", 60, 18, 1)],
+    4: [("Golem de Boue", 90, 12, 8), ("Orc Berserk", 80, 20, 3)],
+    5: [("Golem de Pierre", 120, 15, 12), ("Garde Royal", 100, 22, 10)]
+}
+
+FLOOR_BOSSES = {
+    1: ("[BOSS] Gobelin Royal", 150, 18, 5),
+    2: ("[BOSS] Orc Royal", 250, 25, 8),
+    3: ("[BOSS] Orc Mage Royal", 350, 35, 10),
+    4: ("[BOSS] Golem Ancien", 500, 30, 20),
+    5: ("[BOSS] EMPEREUR GOLEM", 800, 50, 30)
+}
+
+# Statistiques de depart des classes jouables (PV, ATK, DEF)
+CLASS_STATS = {
+    "Guerrier": (100, 15, 5),
+    "Tank": (120, 10, 12),
+    "Mage": (70, 22, 3)
+}
+
+# --- CATALOGUE D'OBJETS ---
+# Chaque objet des tables ci-dessus n'existe qu'une fois, dans ITEM_CATALOG (id -> Item).
+# Les objets sont immuables : un exemplaire identique au modele EST l'instance du
+# catalogue (poids-mouche), seul un exemplaire modifie (prix du marchand, bonus
+# d'etage) a sa propre instance, creee par derive().
+ITEM_CATALOG = {}
+ITEM_IDS = {}  # nom -> id
+BUILTIN_ITEM_IDS = set()  # ids connus sans la sauvegarde (construits depuis les tables)
+
+class Item:
+    # Cle du dict (format des tables et des sauvegardes) -> attribut
+    KEYS = (("name", "name"), ("type", "type"), ("val", "val"), ("desc", "desc"),
+            ("cat", "cat"), ("base_price", "base_price"), ("price", "price"))
+    __slots__ = ("id", "name", "type", "val", "desc", "cat", "base_price", "price", "extra")
+    is_equipment = False
+
+    def __init__(self, item_id, name, type=None, val=None, desc="Objet...", cat="consommable",
+                 base_price=10, price=None, extra=None):
+        self.id = item_id; self.name = name
+        self.type = type; self.val = val
+        self.desc = desc; self.cat = cat
+        self.base_price = base_price; self.price = price  # price : seulement chez le marchand
+        self.extra = extra  # cles inconnues d'un vieux dict, gardees pour la sauvegarde
+
+    @classmethod
+    def from_dict(cls, item_id, data):
+        kind = Equipment if data.get("cat") == "equipment" or "slot" in data else Item
+        known = {key for key, _ in kind.KEYS}
+        kwargs = {attr: data[key] for key, attr in kind.KEYS if key in data}
+        extra = {k: v for k, v in data.items() if k not in known}
+        return kind(item_id, extra=extra or None, **kwargs)
+
+    def to_dict(self):
+        # Format dict d'origine (les champs absents valent None et ne sont pas ecrits)
+        data = {key: getattr(self, attr) for key, attr in self.KEYS if getattr(self, attr) is not None}
+        if self.extra: data.update(self.extra)
+        return data
+
+    def derive(self, **deltas):
+        # Exemplaire modifie : deltas avec les cles du dict (ex : price=40, atk=15)
+        if not deltas: return self
+        return Item.from_dict(self.id, dict(self.to_dict(), **deltas))
+
+    def to_save(self):
+        if self.id not in BUILTIN_ITEM_IDS: return self.to_dict()  # objet inconnu des tables : on garde tout
+        template = ITEM_CATALOG[self.id]
+        if self is template: return self.id
+        base = template.to_dict()
+        deltas = {k: v for k, v in self.to_dict().items() if base.get(k) != v}
+        return {"id": self.id, **deltas} if deltas else self.id
+
+    @classmethod
+    def from_save(cls, data):
+        # Accepte "id", {"id": ..., ecarts} ou un dict complet des anciennes sauvegardes
+        if isinstance(data, str): return ITEM_CATALOG.get(data)
+        if not isinstance(data, dict): return None
+        if "id" in data:
+            template = ITEM_CATALOG.get(data["id"])
+            if template is None: return None
+            return template.derive(**{k: v for k, v in data.items() if k != "id"})
+        if "name" not in data: return None
+        full = normalize_item(data)
+        template = ITEM_CATALOG[register_item(full)]
+        # Compare avec les memes valeurs par defaut que le modele (def/hp a 0...) : un vieux
+        # dict incomplet identique a son modele doit redonner l'instance partagee
+        item = Item.from_dict(template.id, full)
+        return template if item.to_dict() == template.to_dict() else item
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.id!r})"
+
+class Equipment(Item):
+    KEYS = (("name", "name"), ("cat", "cat"), ("slot", "slot"), ("atk", "atk"), ("def", "defense"),
+            ("hp", "hp"), ("desc", "desc"), ("base_price", "base_price"), ("price", "price"))
+    __slots__ = ("slot", "atk", "defense", "hp")
+    is_equipment = True
+
+    def __init__(self, item_id, name, slot="weapon", atk=0, defense=0, hp=0, desc="Objet...",
+                 cat="equipment", base_price=10, price=None, extra=None):
+        super().__init__(item_id, name, desc=desc, cat=cat, base_price=base_price, price=price, extra=extra)
+        self.slot = slot
+        self.atk = atk; self.defense = defense; self.hp = hp
+
+def make_item_id(name):
+    return "_".join("".join(c if c.isalnum() else " " for c in name.lower()).split())
+
+def normalize_item(data):
+    # Meme reparation que les vieilles sauvegardes : categorie, description et prix par defaut
+    item = dict(data)
+    if "cat" not in item: item["cat"] = "equipment" if "slot" in item else "consommable"
+    if "desc" not in item: item["desc"] = "Objet..."
+    if "base_price" not in item: item["base_price"] = 10
+    return item
+
+def register_item(data, builtin=False):
+    # Le premier modele d'un nom fait foi (ex : la Grde Potion du butin de boss)
+    item_id = ITEM_IDS.get(data["name"])
+    if item_id is None:
+        item_id = base_id = make_item_id(data["name"]) or "objet"
+        n = 2
+        while item_id in ITEM_CATALOG: item_id = f"{base_id}_{n}"; n += 1
+        ITEM_CATALOG[item_id] = Item.from_dict(item_id, normalize_item(data))
+        ITEM_IDS[data["name"]] = item_id
+        if builtin: BUILTIN_ITEM_IDS.add(item_id)
+    return item_id
+
+for table in (POSSIBLE_CONSUMABLES, POSSIBLE_EQUIPMENT, MERCHANT_GEAR, BOSS_LOOT):
+    for data in table: register_item(data, builtin=True)
+
+def new_item(template, **deltas):
+    # template : un dict des tables (POSSIBLE_*, MERCHANT_GEAR, BOSS_LOOT) ou un nom
+    name = template if isinstance(template, str) else template["name"]
+    return ITEM_CATALOG[ITEM_IDS[name]].derive(**deltas)
+
+# --- TABLES D'ETAGES ---
+# Au-dela des etages decrits, monstres et boss reprennent ceux du dernier etage
+# multiplies par floor_scaling. Les modeles (nom, PV, ATK, DEF) d'un etage sont
+# calcules a la premiere demande puis gardes : l'etage 10 000 coute autant que
+# l'etage 1. Le facteur aleatoire du monstre est applique en dernier (roll).
+def floor_scaling(floor):
+    return 1 + (max(0, floor - 5) * 0.2)
+
+class FloorTable:
+    def __init__(self, enemies, bosses, max_cached=4096):
+        self.enemies = enemies; self.bosses = bosses
+        self.last_enemies = max(enemies); self.last_boss = max(bosses)
+        self.max_cached = max_cached
+        self.enemy_cache = {}; self.boss_cache = {}
+
+    def monsters(self, floor):
+        # -> modeles (nom, PV, ATK, DEF) en flottants, avant le facteur aleatoire
+        templates = self.enemy_cache.get(floor)
+        if templates is None:
+            scaling = floor_scaling(floor)
+            templates = tuple((name, hp * scaling, atk * scaling, defense * scaling)
+                              for name, hp, atk, defense in self.enemies[min(floor, self.last_enemies)])
+            if len(self.enemy_cache) >= self.max_cached: self.enemy_cache.clear()
+            self.enemy_cache[floor] = templates
+        return templates
+
+    def boss(self, floor):
+        boss = self.boss_cache.get(floor)
+        if boss is None:
+            if floor in self.bosses: boss = self.bosses[floor]
+            else:
+                name, hp, atk, defense = self.bosses[self.last_boss]
+                scaling = floor_scaling(floor) / floor_scaling(self.last_boss)
+                boss = (f"{name} +{floor - self.last_boss}", int(hp * scaling), int(atk * scaling), int(defense * scaling))
+            if len(self.boss_cache) >= self.max_cached: self.boss_cache.clear()
+            self.boss_cache[floor] = boss
+        return boss
+
+    def roll(self, floor, rng=random):
+        # Monstre tire au hasard, avec un facteur de +/- 20% -> (nom, PV, ATK, DEF)
+        name, hp, atk, defense = rng.choice(self.monsters(floor))
+        factor = rng.uniform(0.8, 1.2)
+        return name, int(hp * factor), int(atk * factor), int(defense * factor)
+
+FLOOR_TABLE = FloorTable(FLOOR_ENEMIES, FLOOR_BOSSES)
+
+# Verification du cache des stats derivees (Character.stats) a chaque lecture
+STATS_DEBUG = os.environ.get("RPG_STATS_DEBUG") == "1"
+
+# Chance de coup critique (degats x2) d'attack_target ; fight_odds et simulation.py la reprennent
+CRIT_CHANCE = 0.1
+
+# --- CLASSES ---
+# Entree du sac : un objet et sa quantite. Les consommables s'empilent par id,
+# l'equipement par exemplaire (les poids-mouches identiques partagent donc une pile).
+class Stack:
+    __slots__ = ("item", "qty", "handle")
+
+    def __init__(self, item, qty=1, handle=None):
+        self.item = item; self.qty = qty
+        self.handle = handle  # identifiant stable attribue par l'Inventory
+
+    @staticmethod
+    def key(item):
+        return item if item.is_equipment else item.id
+
+    def to_save(self):
+        data = self.item.to_save()
+        if self.qty == 1: return data
+        if isinstance(data, str): return {"id": data, "qty": self.qty}
+        return dict(data, qty=self.qty)
+
+    def label(self):
+        return self.item.name if self.qty == 1 else f"{self.item.name} x{self.qty}"
+
+# --- SAC A DOS ---
+# Les piles sont designees par une poignee (handle) stable plutot que par leur position :
+# retirer une pile ne decale jamais les autres boutons. Index tenus a jour a chaque
+# ajout/retrait : par categorie et par emplacement d'equipement (dicts ordonnes
+# utilises comme ensembles : ajout, retrait et test en O(1), ordre d'arrivee conserve).
+class Inventory:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.stacks = {}  # handle -> Stack, dans l'ordre d'arrivee
+        self.by_key = {}  # Stack.key(objet) -> Stack (empilement)
+        self.by_cat = {}  # categorie -> {handle: Stack}
+        self.by_slot = {}  # emplacement -> {handle: Stack} (equipement seulement)
+        self.next_handle = 1
+
+    def __len__(self): return len(self.stacks)
+    def __iter__(self): return iter(self.stacks.values())
+
+    def get(self, handle): return self.stacks.get(handle)
+    def find(self, item): return self.by_key.get(Stack.key(item))
+
+    def category(self, cat): return list(self.by_cat.get(cat, {}).values())
+    def slot(self, slot): return list(self.by_slot.get(slot, {}).values())
+
+    def add(self, item, qty=1):
+        key = Stack.key(item)
+        stack = self.by_key.get(key)
+        if stack is None:
+            stack = Stack(item, 0, self.next_handle)
+            self.next_handle += 1
+            self.stacks[stack.handle] = self.by_key[key] = stack
+            self.by_cat.setdefault(item.cat, {})[stack.handle] = stack
+            if item.is_equipment: self.by_slot.setdefault(item.slot, {})[stack.handle] = stack
+        stack.qty += qty
+        return stack
+
+    def take(self, handle, qty=1):
+        # Retire qty exemplaires de la pile ; la pile (et sa poignee) disparait a 0
+        stack = self.stacks[handle]
+        stack.qty -= qty
+        if stack.qty <= 0:
+            item = stack.item
+            del self.stacks[handle]; del self.by_key[Stack.key(item)]
+            del self.by_cat[item.cat][handle]
+            if item.is_equipment: del self.by_slot[item.slot][handle]
+        return stack.item
+
+    def to_save(self):
+        return [stack.to_save() for stack in self.stacks.values()]
+
+# --- STATS EN COLONNES (simulations de masse) ---
+# Une ligne par heros, une colonne par stat : PV de base, PV, ATK et DEF de base,
+# et les bonus d'equipement. Un Character rattache (attach) lit et ecrit sa ligne,
+# et heal / take_damage s'appliquent a des milliers de heros d'un coup.
+# StatStore repose sur array (sans dependance), NumpyStatStore sur NumPy.
+class StatStore:
+    COLUMNS = ("base_hp", "hp", "base_atk", "base_def", "bonus_hp", "bonus_atk", "bonus_def")
+
+    def __init__(self):
+        self.size = 0
+        self.cols = {name: array('q') for name in self.COLUMNS}
+
+    def __len__(self): return self.size
+
+    def add(self, base_hp, base_atk, base_def, hp=None):
+        # -> numero de ligne du nouveau heros (bonus d'equipement a 0)
+        self.append_row((base_hp, base_hp if hp is None else hp, base_atk, base_def, 0, 0, 0))
+        self.size += 1
+        return self.size - 1
+
+    def append_row(self, values):
+        for name, value in zip(self.COLUMNS, values): self.cols[name].append(value)
+
+    def column(self, name): return self.cols[name]
+    def get(self, name, row): return self.cols[name][row]
+    def set(self, name, row, value): self.cols[name][row] = value
+
+    def set_bonus(self, row, hp, atk, defense):
+        c = self.cols
+        c["bonus_hp"][row] = hp; c["bonus_atk"][row] = atk; c["bonus_def"][row] = defense
+
+    def stats(self, row):
+        # -> (max_hp, attaque, defense), comme Character.stats()
+        c = self.cols
+        return (c["base_hp"][row] + c["bonus_hp"][row], c["base_atk"][row] + c["bonus_atk"][row],
+                c["base_def"][row] + c["bonus_def"][row])
+
+    def rows(self, rows): return range(self.size) if rows is None else rows
+
+    def max_hp(self, rows=None):
+        base, bonus = self.cols["base_hp"], self.cols["bonus_hp"]
+        return array('q', (base[r] + bonus[r] for r in self.rows(rows)))
+
+    def alive(self, rows=None):
+        hp = self.cols["hp"]
+        return [hp[r] > 0 for r in self.rows(rows)]
+
+    def heal(self, amount, rows=None):
+        # Character.heal ligne par ligne -> PV reellement rendus
+        hp, base, bonus = self.cols["hp"], self.cols["base_hp"], self.cols["bonus_hp"]
+        healed = array('q')
+        for r in self.rows(rows):
+            new = min(base[r] + bonus[r], hp[r] + amount)
+            healed.append(new - hp[r]); hp[r] = new
+        return healed
+
+    def take_damage(self, dmg, rows=None, rng=random):
+        # Character.take_damage ligne par ligne -> (degats subis, bloques) ; dmg : entier ou un par ligne
+        hp, base, bonus = self.cols["hp"], self.cols["base_def"], self.cols["bonus_def"]
+        dealt = array('q'); blocked = []
+        for i, r in enumerate(self.rows(rows)):
+            defense = base[r] + bonus[r]
+            reduced = max(0, (dmg if isinstance(dmg, int) else dmg[i]) - (defense // 2))
+            is_blocked = rng.randint(0, 100) < min(60, defense * 2)
+            if is_blocked: reduced //= 2
+            hp[r] -= reduced
+            dealt.append(reduced); blocked.append(is_blocked)
+        return dealt, blocked
+
+def numpy_module():
+    # Import paresseux : le jeu lui-meme ne charge jamais NumPy -> module ou None
+    global np
+    if np is None:
+        try: import numpy; np = numpy
+        except ImportError: return None
+    return np
+
+class NumpyStatStore(StatStore):
+    # Memes colonnes dans des tableaux NumPy (capacite doublee au besoin) ;
+    # rows : None (tous) ou un tableau d'indices sans doublon
+    def __init__(self, capacity=64):
+        if numpy_module() is None: raise ImportError("NumpyStatStore demande NumPy")
+        self.size = 0
+        self.cols = {name: np.zeros(max(1, capacity), dtype=np.int64) for name in self.COLUMNS}
+
+    def append_row(self, values):
+        if self.size == len(self.cols["hp"]):
+            for name, col in self.cols.items():
+                grown = np.zeros(2 * len(col), dtype=np.int64); grown[:self.size] = col
+                self.cols[name] = grown
+        for name, value in zip(self.COLUMNS, values): self.cols[name][self.size] = value
+
+    def column(self, name): return self.cols[name][:self.size]
+    def get(self, name, row): return int(self.cols[name][row])
+
+    def stats(self, row): return tuple(int(v) for v in super().stats(row))
+
+    def rows(self, rows): return slice(0, self.size) if rows is None else rows
+
+    def max_hp(self, rows=None):
+        idx = self.rows(rows)
+        return self.cols["base_hp"][idx] + self.cols["bonus_hp"][idx]
+
+    def alive(self, rows=None): return self.cols["hp"][self.rows(rows)] > 0
+
+    def heal(self, amount, rows=None):
+        idx = self.rows(rows); hp = self.cols["hp"]
+        old = hp[idx].copy()  # rows=None : hp[idx] est une vue, modifiee par l'affectation
+        hp[idx] = np.minimum(self.max_hp(rows), old + amount)
+        return hp[idx] - old
+
+    def take_damage(self, dmg, rows=None, rng=None):
+        # rng : numpy.random.Generator (tirages independants de random)
+        idx = self.rows(rows)
+        if rng is None: rng = np.random.default_rng()
+        defense = self.cols["base_def"][idx] + self.cols["bonus_def"][idx]
+        reduced = np.maximum(0, np.asarray(dmg) - (defense // 2))
+        blocked = rng.integers(0, 101, size=defense.shape) < np.minimum(60, defense * 2)
+        reduced = np.where(blocked, reduced // 2, reduced)
+        self.cols["hp"][idx] -= reduced
+        return reduced, blocked
+
+def new_stat_store(capacity=64):
+    # NumPy si installe, sinon le stockage array
+    return NumpyStatStore(capacity) if numpy_module() is not None else StatStore()
+
+class Character:
+    def __init__(self, name, hp, attack, defense, job_class="Guerrier"):
+        self.name = name
+        self.base_max_hp = hp
+        self.hp = hp
+        self.base_attack = attack
+        self.base_defense = defense
+        self.job_class = job_class
+        self.gold = 0 
+        
+        self.inventory = Inventory()
+        self.inventory.add(new_item("Potion Soin (15)")); self.inventory.add(new_item("Epee Rouillee"))
+        
+        self.equipment = {
+            "head": None, "chest": None, "legs": None, 
+            "feet": None, "weapon": None, "ring": None
+        }
+        self.floor = 1; self.kills = 0
+        self._stats = None  # (max_hp, attaque, defense) : cache des stats derivees
+
+    # --- STATS DERIVEES (cache) ---
+    # Base + bonus d'equipement, recalcules seulement apres invalidate_stats() :
+    # equip_item, unequip_item, use_consumable et from_dict l'appellent. Tout code
+    # qui modifie base_* ou equipment directement doit l'appeler aussi
+    # (RPG_STATS_DEBUG=1 verifie le cache a chaque lecture).
+    def equipment_bonus(self):
+        hp = atk = defense = 0
+        for item in self.equipment.values():
+            if item:
+                hp += item.hp; atk += item.atk; defense += item.defense
+        return hp, atk, defense
+
+    def compute_stats(self):
+        hp, atk, defense = self.equipment_bonus()
+        return self.base_max_hp + hp, self.base_attack + atk, self.base_defense + defense
+
+    def invalidate_stats(self):
+        self._stats = None
+
+    def attach(self, store):
+        # Deplace les stats du personnage dans une nouvelle ligne du store -> numero de ligne.
+        # Le personnage devient un StoredCharacter : seuls les heros rattaches paient l'indirection.
+        row = store.add(self.base_max_hp, self.base_attack, self.base_defense, self.hp)
+        for attr in ("base_max_hp", "hp", "base_attack", "base_defense"): del self.__dict__[attr]
+        self.__class__ = StoredCharacter
+        self._store = store; self._row = row
+        self.invalidate_stats()
+        return row
+
+    def stats(self):
+        if self._stats is None: self._stats = self.compute_stats()
+        elif STATS_DEBUG:
+            fresh = self.compute_stats()
+            assert self._stats == fresh, f"Stats en cache perimees pour {self.name}: {self._stats} != {fresh}"
+        return self._stats
+
+    @property
+    def max_hp(self): return self.stats()[0]
+
+    @property
+    def attack_value(self): return self.stats()[1]
+
+    @property
+    def defense_value(self): return self.stats()[2]
+
+    def is_alive(self): return self.hp > 0
+
+    def take_damage(self, dmg):
+        total_def = self.defense_value
+        reduced_dmg = max(0, dmg - (total_def // 2))
+        block_chance = min(60, total_def * 2)
+        is_blocked = False
+        if random.randint(0, 100) < block_chance:
+            is_blocked = True; reduced_dmg //= 2
+        self.hp -= reduced_dmg
+        return reduced_dmg, is_blocked
+
+    def attack_target(self, target):
+        crit = 2 if random.random() < CRIT_CHANCE else 1
+        raw_dmg = self.attack_value * crit
+        actual, blocked = target.take_damage(raw_dmg)
+        crit_str = " (CRIT!)" if crit > 1 else ""
+        block_str = " [PARE]" if blocked else ""
+        return f"{self.name} attaque{crit_str}{block_str}: -{actual} PV"
+
+    def heal(self, amount):
+        old = self.hp
+        self.hp = min(self.max_hp, self.hp + amount)
+        return f"Soin: +{self.hp - old} PV"
+
+    def use_consumable(self, item):
+        if item.type == "heal": return self.heal(item.val)
+        if item.type == "atk": self.base_attack += item.val; msg = f"+{item.val} Base ATK"
+        elif item.type == "def": self.base_defense += item.val; msg = f"+{item.val} Base DEF"
+        else: return "Sans effet"
+        self.invalidate_stats()
+        return msg
+
+    def equip_item(self, handle):
+        stack = self.inventory.get(handle)
+        if stack:
+            item = stack.item
+            if not item.is_equipment:
+                return "Pas equipable"
+            
+            slot = item.slot
+            new_hp_bonus = item.hp
+            
+            self.inventory.take(handle)
+            old_item = self.equipment.get(slot)
+            if old_item:
+                self.hp = max(1, self.hp - old_item.hp)
+                self.inventory.add(old_item)
+            
+            self.equipment[slot] = item
+            self.invalidate_stats()
+            self.hp += new_hp_bonus
+            return f"Equipe : {item.name}"
+        return "Erreur"
+
+    def unequip_item(self, slot):
+        item = self.equipment.get(slot)
+        if item:
+            self.hp = max(1, self.hp - item.hp)
+            self.inventory.add(item)
+            self.equipment[slot] = None
+            self.invalidate_stats()
+            return "Desequipe"
+        return "Vide"
+
+    def apply_loadout(self, loadout):
+        # loadout : {emplacement: objet ou None} (ex : best_loadout) -> nombre de changements
+        changes = 0
+        for slot, item in loadout.items():
+            if item is self.equipment.get(slot): continue
+            if self.equipment.get(slot): self.unequip_item(slot)
+            if item: self.equip_item(self.inventory.find(item).handle)
+            changes += 1
+        return changes
+
+    def batch(self): return InventoryBatch(self)
+
+    def to_dict(self):
+        return {
+            "name": self.name, "base_max_hp": self.base_max_hp, "hp": self.hp,
+            "base_attack": self.base_attack, "base_defense": self.base_defense,
+            "inventory": self.inventory.to_save(),
+            "equipment": {slot: item.to_save() if item else None for slot, item in self.equipment.items()},
+            "floor": self.floor, "kills": self.kills, "job_class": self.job_class,
+            "gold": self.gold
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        c = cls(
+            data["name"], 
+            data.get("base_max_hp", data.get("max_hp", 100)),
+            data.get("base_attack", data.get("attack", 15)),
+            data.get("base_defense", data.get("defense", 5)),
+            data.get("job_class", "Aventurier")
+        )
+        c.hp = data["hp"]
+        c.gold = data.get("gold", 0)
+        c.floor = data.get("floor", 1); c.kills = data.get("kills", 0)
+
+        # Objets : ids du catalogue (+ "qty" pour une pile), ou dicts complets des anciennes
+        # sauvegardes (repares par normalize_item, empiles au chargement)
+        c.inventory.clear()
+        for entry in data.get("inventory", []):
+            qty = 1
+            if isinstance(entry, dict) and "qty" in entry:
+                entry = dict(entry); qty = entry.pop("qty")
+            item = Item.from_save(entry)
+            if item: c.inventory.add(item, qty)
+            else: print(f"Objet inconnu ignore : {entry}")
+        equipment = data.get("equipment") or {}
+        for slot in c.equipment:
+            entry = equipment.get(slot)
+            c.equipment[slot] = Item.from_save(entry) if entry else None
+        c.invalidate_stats()
+        return c
+
+def stored_stat(column):
+    # Stat d'un StoredCharacter : case de sa ligne dans le StatStore
+    def get(self): return self._store.get(column, self._row)
+    def set(self, value): self._store.set(column, self._row, value)
+    return property(get, set)
+
+class StoredCharacter(Character):
+    # Character rattache a un StatStore (voir Character.attach) : PV et bases vivent dans sa ligne
+    base_max_hp = stored_stat("base_hp")
+    hp = stored_stat("hp")
+    base_attack = stored_stat("base_atk")
+    base_defense = stored_stat("base_def")
+
+    def invalidate_stats(self):
+        # Seuls les bonus sont caches (colonnes bonus_*), le store peut modifier les bases en bloc
+        self._stats = None
+        self._store.set_bonus(self._row, *self.equipment_bonus())
+
+    def attach(self, store):
+        raise ValueError(f"{self.name} est deja rattache a un StatStore")
+
+    def stats(self):
+        stats = self._store.stats(self._row)
+        if STATS_DEBUG: assert stats == self.compute_stats(), f"Bonus en colonnes perimes pour {self.name}"
+        return stats
+
+# --- OPERATIONS GROUPEES ---
+# Vendre / jeter / utiliser / equiper tout un ensemble d'objets : les operations
+# sont mises en file puis commit() verifie le lot entier avant de l'appliquer
+# (tout ou rien). L'appelant ne reconstruit l'UI et ne sauvegarde qu'une fois
+# par lot (Game.commit_batch), au lieu d'une fois par objet.
+def sell_price(item):
+    return max(1, item.base_price // 2)
+
+class InventoryBatch:
+    def __init__(self, character):
+        self.character = character
+        self.ops = []  # (type, poignee ou loadout, quantite)
+
+    def __len__(self): return len(self.ops)
+
+    def queue(self, kind, handle, qty):
+        # qty=None : ce qui reste de la pile apres les operations precedentes du lot
+        self.ops.append((kind, handle, qty))
+        return self
+
+    def sell(self, handle, qty=None): return self.queue("sell", handle, qty)
+    def discard(self, handle, qty=None): return self.queue("discard", handle, qty)
+    def use(self, handle, qty=1): return self.queue("use", handle, qty)
+
+    def equip_set(self, loadout):
+        # loadout : {emplacement: objet ou None}, comme best_loadout
+        self.ops.append(("equip", loadout, None))
+        return self
+
+    def check(self):
+        # -> (raison du refus ou None, operations avec leurs quantites resolues)
+        c = self.character; inv = c.inventory
+        left = {}  # poignee -> exemplaires restants apres les operations precedentes du lot
+        resolved = []
+        for kind, target, qty in self.ops:
+            if kind == "equip":
+                for slot, item in target.items():
+                    if item is None or item is c.equipment.get(slot): continue
+                    stack = inv.find(item)
+                    if stack is None or item.slot != slot: return f"{item.name} indisponible", None
+                    if left.setdefault(stack.handle, stack.qty) < 1: return f"{item.name} indisponible", None
+                    left[stack.handle] -= 1
+                resolved.append((kind, target, None))
+                continue
+            stack = inv.get(target)
+            if stack is None: return "objet introuvable", None
+            if kind == "use" and stack.item.cat != "consommable": return f"{stack.item.name} n'est pas utilisable", None
+            remaining = left.setdefault(target, stack.qty)
+            if qty is None: qty = remaining
+            if qty < 1 or remaining < qty: return f"pas assez de {stack.item.name}", None
+            left[target] -= qty
+            resolved.append((kind, target, qty))
+        return None, resolved
+
+    def commit(self):
+        # -> (applique, messages pour le journal)
+        error, ops = self.check()
+        self.ops = []
+        if error: return False, [f"Lot annule : {error}"]
+        c = self.character; inv = c.inventory
+        msgs = []; sold = gold = dropped = 0
+        for kind, target, qty in ops:
+            if kind == "equip":
+                msgs.append(f"Equipement : {c.apply_loadout(target)} changement(s)")
+            elif kind == "use":
+                name = inv.get(target).item.name
+                for _ in range(qty): msg = c.use_consumable(inv.take(target))
+                msgs.append(msg if qty == 1 else f"Utilise : {name} x{qty}")
+            else:
+                item = inv.take(target, qty)
+                if kind == "sell": sold += qty; gold += sell_price(item) * qty
+                else: dropped += qty
+        if sold:
+            c.gold += gold
+            msgs.append(f"Vendu : {sold} objet(s) (+{gold} Or)")
+        if dropped: msgs.append(f"Jete : {dropped} objet(s)")
+        return True, msgs
+
+# --- ENNEMIS ---
+# Un monstre n'a ni sac ni equipement : ses stats sont fixees a l'apparition.
+# Meme interface de combat que Character (attack_target / take_damage / is_alive).
+class Enemy:
+    __slots__ = ("name", "hp", "max_hp", "attack_value", "defense_value", "is_boss")
+
+    def __init__(self, name, hp, attack, defense, is_boss=False):
+        self.reset(name, hp, attack, defense, is_boss)
+
+    def reset(self, name, hp, attack, defense, is_boss=False):
+        self.name = name; self.hp = self.max_hp = hp
+        self.attack_value = attack; self.defense_value = defense
+        self.is_boss = is_boss
+        return self
+
+    # Regles de combat partagees avec le joueur (elles ne lisent que name, hp et les stats)
+    is_alive = Character.is_alive
+    take_damage = Character.take_damage
+    attack_target = Character.attack_target
+
+    def __repr__(self):
+        return f"Enemy({self.name!r}, {self.hp}/{self.max_hp})"
+
+class EnemyPool:
+    # Recycle les monstres vaincus au lieu d'en allouer un par combat
+    def __init__(self, max_free=64):
+        self.free = []; self.max_free = max_free
+
+    def acquire(self, name, hp, attack, defense, is_boss=False):
+        if self.free: return self.free.pop().reset(name, hp, attack, defense, is_boss)
+        return Enemy(name, hp, attack, defense, is_boss)
+
+    def release(self, enemy):
+        if enemy is not None and len(self.free) < self.max_free: self.free.append(enemy)
+
+ENEMY_POOL = EnemyPool()
+
+# --- OPTIMISEUR D'EQUIPEMENT ---
+# Cherche, emplacement par emplacement, la meilleure combinaison d'objets (portes ou
+# dans le sac) pour un objectif. Les bonus s'additionnent et les trois objectifs
+# croissent avec (ATK, DEF, PV) : seules les combinaisons Pareto-optimales peuvent
+# gagner. On elague donc chaque emplacement puis on fusionne les fronts de Pareto
+# emplacement apres emplacement, au lieu d'essayer toutes les combinaisons.
+LOADOUT_OBJECTIVES = {"atk": "Attaque", "ehp": "Survie", "win": "Victoire"}
+
+def pareto_front(candidates):
+    # candidates : {(atk, def, hp): choix} -> garde les vecteurs non domines
+    kept = []
+    for vec in sorted(candidates, reverse=True):
+        if not any(k[0] >= vec[0] and k[1] >= vec[1] and k[2] >= vec[2] for k in kept):
+            kept.append(vec)
+    return {vec: candidates[vec] for vec in kept}
+
+def floor_enemy_stats(floor):
+    # Monstres de l'etage (facteur aleatoire moyen = 1), memes modeles que spawn_enemy
+    return [(int(hp), int(atk), int(defense)) for _, hp, atk, defense in FLOOR_TABLE.monsters(floor)]
+
+def block_threshold(defense):
+    # take_damage : bloque si randint(0, 100) < min(60, def * 2)
+    return min(60, defense * 2)
+
+def block_chance(defense):
+    return max(0, block_threshold(defense)) / 101
+
+def expected_hit(dmg, defense):
+    # Esperance des degats subis par take_damage(dmg) avec cette defense
+    reduced = max(0, dmg - (defense // 2))
+    p = block_chance(defense)
+    return (1 - p) * reduced + p * (reduced // 2)
+
+def effective_hp(hp, defense, enemies):
+    # PV equivalents sans defense : PV * degats bruts / degats reellement subis, moyenne sur l'etage
+    total = 0
+    for _, atk, _ in enemies:
+        taken = expected_hit(atk, defense)
+        total += hp * atk / taken if taken else hp * atk * 1000
+    return total / len(enemies)
+
+def loadout_score(objective, atk, defense, hp, enemies):
+    if objective == "atk": return (atk, effective_hp(hp, defense, enemies))
+    if objective == "ehp": return (effective_hp(hp, defense, enemies), atk)
+    win = sum(fight_odds(hp, atk, defense, *enemy)["win_rate"] for enemy in enemies) / len(enemies)
+    return (win, atk + defense + hp)
+
+def best_loadout(character, objective="atk", floor=None):
+    # -> ({emplacement: objet ou None}, score) ; les egalites gardent l'objet deja porte
+    enemies = floor_enemy_stats(floor or character.floor)
+    slots = list(character.equipment)
+    front = {(0, 0, 0): ()}
+    for slot in slots:
+        equipped = character.equipment[slot]
+        candidates = {}
+        if equipped: candidates[(equipped.atk, equipped.defense, equipped.hp)] = equipped
+        for stack in character.inventory.slot(slot):
+            item = stack.item
+            candidates.setdefault((item.atk, item.defense, item.hp), item)
+        candidates.setdefault((0, 0, 0), None)
+        candidates = pareto_front(candidates)
+
+        merged = {}
+        for vec, choice in front.items():
+            for (a, d, h), item in candidates.items():
+                merged.setdefault((vec[0] + a, vec[1] + d, vec[2] + h), choice + (item,))
+        front = pareto_front(merged)
+
+    best = None
+    for (a, d, h), choice in front.items():
+        score = loadout_score(objective, character.base_attack + a, character.base_defense + d,
+                              character.base_max_hp + h, enemies)
+        unchanged = sum(item is character.equipment[slot] for slot, item in zip(slots, choice))
+        score += (unchanged,)  # a score egal, le moins de changements possible
+        if best is None or score > best[0]: best = (score, choice)
+    return dict(zip(slots, best[1])), best[0][0]
+
+# --- PROBABILITE DE VICTOIRE EXACTE ---
+# Les coups du heros ne dependent que des tirages critique/parade du monstre et
+# les ripostes que de la parade du heros : le nombre de coups pour tuer chaque
+# camp suit deux lois independantes. Chacune se calcule par programmation
+# dynamique sur les PV restants (KillTime), mise en cache et prolongee seulement
+# tant que l'autre camp peut encore etre en vie. Le heros frappe en premier :
+# il gagne au coup k s'il a survecu aux k - 1 ripostes precedentes.
+MAX_TURNS = 500  # un combat encore indecis est perdu (simulation.py utilise la meme limite)
+KILL_TIME_CACHE = OrderedDict()
+KILL_TIME_CACHE_SIZE = 512
+
+def hit_outcomes(dmg, defense, crit=True):
+    # -> ((degats, probabilite), ...) d'une attaque (attack_target / riposte) sur cette defense
+    p_block = block_chance(defense)
+    outcomes = {}
+    for mult, p in (((2, CRIT_CHANCE), (1, 1 - CRIT_CHANCE)) if crit else ((1, 1.0),)):
+        reduced = max(0, dmg * mult - (defense // 2))
+        outcomes[reduced] = outcomes.get(reduced, 0.0) + p * (1 - p_block)
+        outcomes[reduced // 2] = outcomes.get(reduced // 2, 0.0) + p * p_block
+    return tuple(sorted((d, p) for d, p in outcomes.items() if p > 0))
+
+class KillTime:
+    # Loi du nombre de coups encaisses : apres k coups, survival[k] = P(encore en vie)
+    # et hp_alive[k] = E[PV restants, 0 si mort]. dist : PV restants -> probabilite.
+    def __init__(self, hp, outcomes):
+        self.stay = sum(p for d, p in outcomes if d == 0)  # coups sans effet
+        self.hits = [(d, p) for d, p in outcomes if d > 0]
+        self.dist = {hp: 1.0} if hp > 0 else {}
+        self.survival = [1.0 if hp > 0 else 0.0]
+        self.hp_alive = [float(max(0, hp))]
+
+    def extend(self, k):
+        stay = self.stay; hits = self.hits
+        while len(self.survival) <= k:
+            new = {}
+            for hp, p in self.dist.items():
+                if stay: new[hp] = new.get(hp, 0.0) + p * stay
+                for d, q in hits:
+                    if hp > d: new[hp - d] = new.get(hp - d, 0.0) + p * q
+            self.dist = new
+            self.survival.append(sum(new.values()))
+            self.hp_alive.append(sum(hp * p for hp, p in new.items()))
+
+def kill_time(hp, outcomes):
+    # Memoise : la meme loi sert a toutes les combinaisons de stats de l'autre camp
+    key = (hp, outcomes)
+    kt = KILL_TIME_CACHE.get(key)
+    if kt is None:
+        kt = KILL_TIME_CACHE[key] = KillTime(hp, outcomes)
+        if len(KILL_TIME_CACHE) > KILL_TIME_CACHE_SIZE: KILL_TIME_CACHE.popitem(last=False)
+    else: KILL_TIME_CACHE.move_to_end(key)
+    return kt
+
+def fight_odds(hero_hp, hero_atk, hero_def, enemy_hp, enemy_atk, enemy_def, max_turns=MAX_TURNS):
+    # Combat du COMBAT (attack_round) calcule exactement ->
+    #   win_rate : probabilite de victoire
+    #   turns    : esperance du nombre d'attaques du heros
+    #   hp_loss  : esperance des PV perdus (tous les PV en cas de defaite)
+    #   hp_left  : PV restants en moyenne apres une victoire (None si impossible)
+    steps = fight_odds_steps(hero_hp, hero_atk, hero_def, enemy_hp, enemy_atk, enemy_def, max_turns)
+    for result in steps: pass
+    return result
+
+def fight_odds_steps(hero_hp, hero_atk, hero_def, enemy_hp, enemy_atk, enemy_def, max_turns=MAX_TURNS):
+    # Meme calcul, un coup a la fois : cede None apres chaque coup, puis le resultat
+    enemy = kill_time(enemy_hp, hit_outcomes(hero_atk, enemy_def, crit=True))
+    hero = kill_time(hero_hp, hit_outcomes(enemy_atk, hero_def, crit=False))
+    win = turns = hp_left = 0.0
+    for k in range(1, max_turns + 1):
+        enemy.extend(k); hero.extend(k - 1)
+        both_alive = enemy.survival[k - 1] * hero.survival[k - 1]  # P(le heros porte son k-ieme coup)
+        if both_alive == 0: break
+        turns += both_alive
+        killed = max(0.0, enemy.survival[k - 1] - enemy.survival[k])  # P(le monstre tombe au k-ieme coup)
+        win += killed * hero.survival[k - 1]
+        hp_left += killed * hero.hp_alive[k - 1]
+        yield None
+    yield {
+        "win_rate": win,
+        "turns": turns,
+        "hp_loss": max(0, hero_hp) - hp_left,
+        "hp_left": hp_left / win if win else None,
+    }
+
+# --- APERCU DES CHANCES DE VICTOIRE ---
+# Le CAMP et le COMBAT affichent la chance de victoire a chaque frame : les chances
+# sont gardees par stats (LRU) et ne sont recalculees que si PV / ATK / DEF changent.
+# Un calcul peut durer plusieurs dizaines de ms (gros PV des deux cotes) : il avance
+# par tranches de budget_ms par frame, l'interface affiche "..." en attendant.
+#   (PV, ATK, DEF, PV, ATK, DEF monstre) -> chance contre ce monstre
+#   (PV, ATK, DEF, etage, boss)          -> chance contre le prochain adversaire
+ROLL_FACTORS = (0.84, 0.92, 1.0, 1.08, 1.16)  # milieux de 5 tranches de uniform(0.8, 1.2)
+
+def next_opponents(floor, boss):
+    # Stats possibles du prochain adversaire (FloorTable.roll / boss), a ponderer egalement
+    if boss: return [tuple(FLOOR_TABLE.boss(floor)[1:])]
+    return [(int(hp * f), int(atk * f), int(defense * f))
+            for _, hp, atk, defense in FLOOR_TABLE.monsters(floor) for f in ROLL_FACTORS]
+
+class OutcomeCache:
+    def __init__(self, max_entries=1024, budget_ms=3):
+        self.max_entries = max_entries
+        self.budget = budget_ms / 1000
+        self.entries = OrderedDict()  # cle -> chance de victoire
+        self.job_key = None; self.job = None  # calcul en cours (le dernier demande)
+        self.hits = 0; self.misses = 0; self.evictions = 0; self.compute_time = 0.0
+
+    def win_chance(self, player, enemy=None):
+        # enemy : monstre en cours ; None = prochain adversaire de l'etage -> chance, ou None si pas pret
+        hero = (max(0, player.hp), player.attack_value, player.defense_value)
+        if enemy is not None:
+            key = hero + (max(0, enemy.hp), enemy.attack_value, enemy.defense_value)
+            opponents = [key[3:]]
+        else:
+            boss = player.kills >= 10
+            key = hero + (player.floor, boss)
+            opponents = None
+        chance = self.entries.get(key)
+        if chance is not None:
+            self.entries.move_to_end(key); self.hits += 1
+            return chance
+        if key != self.job_key:
+            # Un calcul abandonne (stats changees entre-temps) n'est pas repris
+            self.misses += 1
+            if opponents is None: opponents = next_opponents(player.floor, boss)
+            self.job_key = key; self.job = self.average(hero, opponents)
+        self.work()
+        return self.entries.get(key)
+
+    def busy(self): return self.job is not None
+
+    def work(self):
+        start = time.perf_counter(); deadline = start + self.budget
+        try:
+            while time.perf_counter() < deadline: next(self.job)
+        except StopIteration as done:
+            self.store(self.job_key, done.value)
+            self.job_key = self.job = None
+        self.compute_time += time.perf_counter() - start
+
+    def average(self, hero, opponents):
+        # Chance moyenne contre chaque adversaire, chacun garde aussi a part
+        total = 0.0
+        for enemy in opponents:
+            key = hero + enemy
+            chance = self.entries.get(key)
+            if chance is None and enemy[0] > MAX_TURNS * hit_outcomes(hero[1], enemy[2])[-1][0]:
+                chance = 0.0  # intuable en MAX_TURNS coups meme tout en critiques : perdu d'avance
+                self.store(key, chance)
+            if chance is None:
+                for result in fight_odds_steps(*key): yield
+                chance = result["win_rate"]
+                self.store(key, chance)
+            total += chance
+        return total / len(opponents)
+
+    def store(self, key, chance):
+        self.entries[key] = chance
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False); self.evictions += 1
+
+    def clear(self):
+        self.entries.clear(); self.job_key = self.job = None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.entries), "busy": self.busy(),
+                "compute_ms": round(self.compute_time * 1000, 3)}
+
+OUTCOME_CACHE = OutcomeCache()
+
+# --- REGLES DE PARTIE ---
+# Deroulement des combats, butin, marchand et progression d'etage. Les fonctions
+# renvoient les messages du journal ; l'interface les affiche et change d'ecran.
+def new_hero(name, job_class):
+    hp, atk, defense = CLASS_STATS[job_class]
+    return Character(name, hp, atk, defense, job_class)
+
+def spawn_enemy(player, previous=None, pool=ENEMY_POOL):
+    # -> (monstre, message) ; previous : l'ancien monstre, rendu au pool
+    floor = player.floor
+    pool.release(previous)
+    if player.kills >= 10:
+        name, hp, atk, defense = FLOOR_TABLE.boss(floor)
+        return pool.acquire(name, hp, atk, defense, is_boss=True), f"[!] BOSS ETAGE {floor}: {name} !"
+    name, hp, atk, defense = FLOOR_TABLE.roll(floor)
+    return pool.acquire(name, hp, atk, defense, is_boss=False), f"[!] {name} (Niv.{floor}) apparait !"
+
+def claim_victory(player, enemy):
+    # Or, butin et progression apres un monstre vaincu -> messages
+    msgs = []
+    gold_gain = 5
+    if random.random() < 0.2:
+        gold_gain += 15
+        msgs.append("($) Bourse trouvee ! (+15 Or)")
+    player.gold += gold_gain
+    msgs.append(f"Gain: +{gold_gain} Or")
+
+    if enemy.is_boss:
+        player.floor += 1; player.kills = 0
+        msgs.append("[!] BOSS VAINCU ! ETAGE SUIVANT !")
+        for loot in BOSS_LOOT: player.inventory.add(new_item(loot))
+    else:
+        player.kills += 1
+        msgs.append(f"Ennemi vaincu ({player.kills}/10)")
+        if random.random() < 0.35:
+            if random.random() < 0.7: loot_item = new_item(random.choice(POSSIBLE_CONSUMABLES))
+            else: loot_item = new_item(random.choice(POSSIBLE_EQUIPMENT))
+            player.inventory.add(loot_item)
+            msgs.append(f"Loot: {loot_item.name}")
+    return msgs
+
+def attack_round(player, enemy):
+    # Le heros frappe, puis le monstre riposte s'il est encore debout
+    # -> (messages, issue) : "win", "lose" ou None si le combat continue
+    msgs = [player.attack_target(enemy)]
+    if not enemy.is_alive(): return msgs + claim_victory(player, enemy), "win"
+    dmg, blocked = player.take_damage(enemy.attack_value)
+    block_msg = " [BLOQUE]" if blocked else ""
+    msgs.append(f"RIPOSTE : -{dmg} PV{block_msg}")
+    return msgs, (None if player.is_alive() else "lose")
+
+def flee(player, enemy):
+    # -> (messages, issue) : "fled", "lose" ou None si le heros reste au combat
+    if enemy.is_boss:
+        dmg, blocked = player.take_damage(enemy.attack_value)
+        msgs = ["[!] Impossible de fuir un BOSS !", f"Attaque Gratuite : -{dmg} PV"]
+    elif random.random() < 0.5:
+        return [">> Fuite reussie !"], "fled"
+    else:
+        dmg, blocked = player.take_damage(enemy.attack_value)
+        msgs = ["[!] Fuite ratee !", f"Coups recus : -{dmg} PV"]
+    return msgs, (None if player.is_alive() else "lose")
+
+def shop_stock(floor):
+    # Consommables au prix de l'etage + 3 pieces d'equipement tirees au hasard
+    items = []
+    for pot in POSSIBLE_CONSUMABLES:
+        price = int(pot["base_price"] * (1 + (floor * 0.1)))
+        items.append(new_item(pot, price=price))
+
+    possible_gears = POSSIBLE_EQUIPMENT + MERCHANT_GEAR
+    for _ in range(3):
+        gear = random.choice(possible_gears)
+        # Bonus d'etage stockes comme ecarts de l'exemplaire, le modele reste partage
+        deltas = {"price": int(gear["base_price"] * (1 + (floor * 0.2)))}
+        if gear["atk"] > 0: deltas["atk"] = gear["atk"] + floor
+        if gear["def"] > 0: deltas["def"] = gear["def"] + (floor // 2)
+        items.append(new_item(gear, **deltas))
+    return items
+
+def buy_item(player, item):
+    # -> (achete, message)
+    if player.gold < item.price: return False, "Pas assez d'or !"
+    player.gold -= item.price
+    # Le prix reste au marchand : un consommable achete rejoint la pile du modele
+    player.inventory.add(item if item.is_equipment else ITEM_CATALOG[item.id])
+    return True, f"Achete : {item.name}"
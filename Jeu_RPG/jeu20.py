@@ -1,823 +1,1403 @@
-import pygame
-import sys
-import json
-import random
-import os
-
-# --- CONFIGURATION ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SAVES_DIR = os.path.join(BASE_DIR, "saves")
-if not os.path.exists(SAVES_DIR):
-    os.makedirs(SAVES_DIR)
-
-# --- BASES DE DONNÉES ---
-POSSIBLE_CONSUMABLES = [
-    {"name": "Potion Soin (15)", "type": "heal", "val": 15, "desc": "Rend 15 PV", "cat": "consommable", "base_price": 20},
-    {"name": "Grde Potion (30)", "type": "heal", "val": 30, "desc": "Rend 30 PV", "cat": "consommable", "base_price": 45},
-    {"name": "Elixir Force (+2)", "type": "atk", "val": 2, "desc": "+2 Base Atk", "cat": "consommable", "base_price": 60},
-    {"name": "Peau Pierre (+2)", "type": "def", "val": 2, "desc": "+2 Base Def", "cat": "consommable", "base_price": 60}
-]
-
-POSSIBLE_EQUIPMENT = [
-    {"name": "Epee Rouillee", "cat": "equipment", "slot": "weapon", "atk": 5, "def": 0, "hp": 0, "desc": "+5 ATK", "base_price": 10},
-    {"name": "Hache Guerre", "cat": "equipment", "slot": "weapon", "atk": 12, "def": -2, "hp": 0, "desc": "+12 ATK/-2 DEF", "base_price": 30},
-    {"name": "Casque Cuir", "cat": "equipment", "slot": "head", "atk": 0, "def": 3, "hp": 0, "desc": "+3 DEF", "base_price": 15},
-    {"name": "Heaume Acier", "cat": "equipment", "slot": "head", "atk": 0, "def": 6, "hp": 0, "desc": "+6 DEF", "base_price": 40},
-    {"name": "Tunique Tissu", "cat": "equipment", "slot": "chest", "atk": 0, "def": 2, "hp": 20, "desc": "+2 DEF/+20 HP", "base_price": 25},
-    {"name": "Cotte Mailles", "cat": "equipment", "slot": "chest", "atk": 0, "def": 10, "hp": 10, "desc": "+10 DEF/+10 HP", "base_price": 55},
-    {"name": "Jambieres Cuir", "cat": "equipment", "slot": "legs", "atk": 0, "def": 4, "hp": 0, "desc": "+4 DEF", "base_price": 20},
-    {"name": "Bottes Marche", "cat": "equipment", "slot": "feet", "atk": 0, "def": 2, "hp": 0, "desc": "+2 DEF", "base_price": 10},
-    {"name": "Anneau Vie", "cat": "equipment", "slot": "ring", "atk": 0, "def": 0, "hp": 40, "desc": "+40 HP", "base_price": 80},
-    {"name": "Anneau Rage", "cat": "equipment", "slot": "ring", "atk": 5, "def": 0, "hp": 0, "desc": "+5 ATK", "base_price": 70}
-]
-
-MERCHANT_GEAR = [
-    {"name": "Katana Aiguise", "cat": "equipment", "slot": "weapon", "atk": 18, "def": 0, "hp": 0, "desc": "+18 ATK", "base_price": 120},
-    {"name": "Masse d'Or", "cat": "equipment", "slot": "weapon", "atk": 14, "def": 2, "hp": 0, "desc": "+14 ATK/+2 DEF", "base_price": 110},
-    {"name": "Plastron Dore", "cat": "equipment", "slot": "chest", "atk": 0, "def": 15, "hp": 30, "desc": "+15 DEF/+30 HP", "base_price": 150},
-    {"name": "Bottes Vitesse", "cat": "equipment", "slot": "feet", "atk": 2, "def": 4, "hp": 0, "desc": "+2 ATK/+4 DEF", "base_price": 90},
-    {"name": "Casque Royal", "cat": "equipment", "slot": "head", "atk": 0, "def": 9, "hp": 10, "desc": "+9 DEF/+10 HP", "base_price": 130}
-]
-
-BOSS_LOOT = [
-    {"name": "Grde Potion (30)", "type": "heal", "val": 30, "desc": "Rend 30 PV", "cat": "consommable"},
-    {"name": "Epee Legendaire", "cat": "equipment", "slot": "weapon", "atk": 25, "def": 5, "hp": 0, "desc": "+25 ATK/+5 DEF"}
-]
-
-FLOOR_ENEMIES = {
-    1: [("Gobelin", 30, 8, 0), ("Rat Geant", 25, 6, 0)],
-    2: [("Orc", 50, 12, 2), ("Gobelin Elite", 45, 11, 2)],
-    3: [("Orc Guerrier", 70, 15, 4), ("Orc Mage", 60, 18, 1)],
-    4: [("Golem de Boue", 90, 12, 8), ("Orc Berserk", 80, 20, 3)],
-    5: [("Golem de Pierre", 120, 15, 12), ("Garde Royal", 100, 22, 10)]
-}
-
-FLOOR_BOSSES = {
-    1: ("[BOSS] Gobelin Royal", 150, 18, 5),
-    2: ("[BOSS] Orc Royal", 250, 25, 8),
-    3: ("[BOSS] Orc Mage Royal", 350, 35, 10),
-    4: ("[BOSS] Golem Ancien", 500, 30, 20),
-    5: ("[BOSS] EMPEREUR GOLEM", 800, 50, 30)
-}
-
-# --- INIT PYGAME ---
-pygame.init()
-
-# Résolution logique du jeu (Interne)
-GAME_WIDTH, GAME_HEIGHT = 800, 600
-
-# Surface "Virtuelle" (C'est là qu'on dessine le jeu)
-game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
-
-# Fenêtre réelle (Au départ en 800x600 fenêtré)
-real_window = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT), pygame.RESIZABLE)
-
-pygame.display.set_caption("Mini RPG - Fullscreen Scaled")
-CLOCK = pygame.time.Clock()
-
-# --- COULEURS & FONTS ---
-WHITE = (255, 255, 255); BLACK = (10, 10, 10); GRAY = (50, 50, 50)
-LIGHT_GRAY = (170, 170, 170); RED = (200, 50, 50); DARK_RED = (100, 0, 0)
-GREEN = (50, 200, 50); BLUE = (50, 50, 200); GOLD = (218, 165, 32)
-PURPLE = (128, 0, 128); DARK_BLUE = (20, 20, 50); ORANGE = (255, 140, 0)
-CYAN = (0, 255, 255)
-
-FONT_TITLE = pygame.font.SysFont("Arial", 40, bold=True)
-FONT_SUBTITLE = pygame.font.SysFont("Arial", 28, bold=True)
-FONT_TEXT = pygame.font.SysFont("Arial", 20)
-FONT_SMALL = pygame.font.SysFont("Arial", 16)
-
-# --- CLASSES ---
-class Character:
-    def __init__(self, name, hp, attack, defense, job_class="Guerrier"):
-        self.name = name
-        self.base_max_hp = hp
-        self.hp = hp
-        self.base_attack = attack
-        self.base_defense = defense
-        self.job_class = job_class
-        self.gold = 0 
-        
-        self.inventory = [
-            {"name": "Potion Soin (15)", "type": "heal", "val": 15, "desc": "Rend 15 PV", "cat": "consommable", "base_price": 20},
-            {"name": "Epee Rouillee", "cat": "equipment", "slot": "weapon", "atk": 5, "def": 0, "hp": 0, "desc": "+5 ATK", "base_price": 10}
-        ]
-        
-        self.equipment = {
-            "head": None, "chest": None, "legs": None, 
-            "feet": None, "weapon": None, "ring": None
-        }
-        self.floor = 1; self.kills = 0
-
-    @property
-    def max_hp(self):
-        bonus = sum(item.get("hp", 0) for item in self.equipment.values() if item)
-        return self.base_max_hp + bonus
-
-    @property
-    def attack_value(self):
-        bonus = sum(item.get("atk", 0) for item in self.equipment.values() if item)
-        return self.base_attack + bonus
-
-    @property
-    def defense_value(self):
-        bonus = sum(item.get("def", 0) for item in self.equipment.values() if item)
-        return self.base_defense + bonus
-
-    def is_alive(self): return self.hp > 0
-
-    def take_damage(self, dmg):
-        total_def = self.defense_value
-        reduced_dmg = max(0, dmg - (total_def // 2))
-        block_chance = min(60, total_def * 2)
-        is_blocked = False
-        if random.randint(0, 100) < block_chance:
-            is_blocked = True; reduced_dmg //= 2
-        self.hp -= reduced_dmg
-        return reduced_dmg, is_blocked
-
-    def attack_target(self, target):
-        crit = 2 if random.random() < 0.1 else 1
-        raw_dmg = self.attack_value * crit
-        actual, blocked = target.take_damage(raw_dmg)
-        crit_str = " (CRIT!)" if crit > 1 else ""
-        block_str = " [PARE]" if blocked else ""
-        return f"{self.name} attaque{crit_str}{block_str}: -{actual} PV"
-
-    def heal(self, amount):
-        old = self.hp
-        self.hp = min(self.max_hp, self.hp + amount)
-        return f"Soin: +{self.hp - old} PV"
-
-    def equip_item(self, item_index):
-        if 0 <= item_index < len(self.inventory):
-            item = self.inventory[item_index]
-            cat = item.get("cat", "unknown")
-            if cat != "equipment" and "slot" not in item:
-                return "Pas equipable"
-            
-            slot = item.get("slot", "weapon")
-            new_hp_bonus = item.get("hp", 0)
-            
-            old_item = self.equipment.get(slot)
-            if old_item:
-                old_hp_bonus = old_item.get("hp", 0)
-                self.hp = max(1, self.hp - old_hp_bonus)
-                self.inventory.append(old_item)
-            
-            self.equipment[slot] = item
-            self.inventory.pop(item_index)
-            self.hp += new_hp_bonus
-            return f"Equipe : {item['name']}"
-        return "Erreur"
-
-    def unequip_item(self, slot):
-        item = self.equipment.get(slot)
-        if item:
-            hp_bonus = item.get("hp", 0)
-            self.hp = max(1, self.hp - hp_bonus)
-            self.inventory.append(item)
-            self.equipment[slot] = None
-            return "Desequipe"
-        return "Vide"
-
-    def to_dict(self):
-        return {
-            "name": self.name, "base_max_hp": self.base_max_hp, "hp": self.hp,
-            "base_attack": self.base_attack, "base_defense": self.base_defense,
-            "inventory": self.inventory, "equipment": self.equipment,
-            "floor": self.floor, "kills": self.kills, "job_class": self.job_class,
-            "gold": self.gold
-        }
-
-    @classmethod
-    def from_dict(cls, data):
-        c = cls(
-            data["name"], 
-            data.get("base_max_hp", data.get("max_hp", 100)),
-            data.get("base_attack", data.get("attack", 15)),
-            data.get("base_defense", data.get("defense", 5)),
-            data.get("job_class", "Aventurier")
-        )
-        c.hp = data["hp"]
-        c.gold = data.get("gold", 0)
-        c.inventory = data.get("inventory", [])
-        c.equipment = data.get("equipment", {k:None for k in ["head","chest","legs","feet","weapon","ring"]})
-        c.floor = data.get("floor", 1); c.kills = data.get("kills", 0)
-
-        repaired_inventory = []
-        for item in c.inventory:
-            if isinstance(item, dict):
-                if "cat" not in item:
-                    if "slot" in item: item["cat"] = "equipment"
-                    else: item["cat"] = "consommable"
-                if "desc" not in item: item["desc"] = "Objet..."
-                if "base_price" not in item: item["base_price"] = 10
-                repaired_inventory.append(item)
-        c.inventory = repaired_inventory
-        return c
-
-class Enemy(Character):
-    def __init__(self, name, hp, attack, defense, is_boss=False):
-        super().__init__(name, hp, attack, defense, "Monstre")
-        self.is_boss = is_boss
-        self.inventory = []
-
-class Button:
-    def __init__(self, text, x, y, w, h, color, data=None):
-        self.rect = pygame.Rect(x, y, w, h)
-        self.text = text; self.color = color; self.data = data
-        self.hover = False; self.disabled = False; self.selected = False
-
-    def draw(self, surface, offset_y=0):
-        adjusted_rect = self.rect.move(0, offset_y)
-        if self.disabled: draw_col = GRAY
-        elif self.hover: draw_col = (min(self.color[0]+30, 255), min(self.color[1]+30, 255), min(self.color[2]+30, 255))
-        else: draw_col = self.color
-        
-        pygame.draw.rect(surface, draw_col, adjusted_rect, border_radius=8)
-        border_col = GOLD if self.selected else WHITE
-        border_width = 4 if self.selected else 2
-        pygame.draw.rect(surface, border_col, adjusted_rect, border_width, border_radius=8)
-        
-        display_text = self.text
-        if len(display_text) > 18: 
-             display_text = display_text[:16] + ".."
-
-        txt_surf = FONT_TEXT.render(display_text, True, WHITE)
-        txt_rect = txt_surf.get_rect(center=adjusted_rect.center)
-        surface.blit(txt_surf, txt_rect)
-
-    def check_hover(self, pos, offset_y=0):
-        adjusted_rect = self.rect.move(0, offset_y)
-        if not self.disabled: self.hover = adjusted_rect.collidepoint(pos)
-
-    def is_clicked(self, event, offset_y=0, check_bounds=False):
-        adjusted_rect = self.rect.move(0, offset_y)
-        if self.disabled: return False
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            if adjusted_rect.collidepoint(event.pos):
-                if check_bounds:
-                    if adjusted_rect.bottom < 100 or adjusted_rect.top > 520: return False
-                return True
-        return False
-
-# --- MOTEUR ---
-class Game:
-    def __init__(self):
-        self.state = "MENU"
-        self.previous_state = "MENU"
-        self.player = None; self.enemy = None
-        self.logs = ["Bienvenue !"]
-        self.input_text = ""
-        self.save_files_buttons = []; self.item_buttons = []
-        self.shop_items = []
-        self.last_shop_floor = 0
-        self.next_rest_time = 0
-        self.selected_class = "Guerrier"
-        self.inv_scroll_y = 0
-        
-        # Gestion Fenêtre / Plein Ecran
-        self.is_fullscreen = False
-        
-        self.setup_ui()
-
-    def add_log(self, msg):
-        self.logs.insert(0, msg)
-        if len(self.logs) > 6: self.logs.pop()
-
-    def toggle_fullscreen(self):
-        global real_window
-        self.is_fullscreen = not self.is_fullscreen
-        if self.is_fullscreen:
-            real_window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-        else:
-            real_window = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT), pygame.RESIZABLE)
-
-    def generate_shop(self):
-        if self.player.floor != self.last_shop_floor:
-            self.shop_items = []
-            self.last_shop_floor = self.player.floor
-            
-            for pot in POSSIBLE_CONSUMABLES:
-                item = pot.copy()
-                item["price"] = int(item["base_price"] * (1 + (self.player.floor * 0.1)))
-                self.shop_items.append(item)
-            
-            possible_gears = POSSIBLE_EQUIPMENT + MERCHANT_GEAR
-            for _ in range(3):
-                gear = random.choice(possible_gears).copy()
-                gear["price"] = int(gear["base_price"] * (1 + (self.player.floor * 0.2)))
-                if gear["atk"] > 0: gear["atk"] += self.player.floor
-                if gear["def"] > 0: gear["def"] += (self.player.floor // 2)
-                self.shop_items.append(gear)
-
-    def setup_ui(self):
-        self.btn_new = Button("Nouvelle Partie", 300, 200, 200, 50, BLUE)
-        self.btn_load_menu = Button("Charger Partie", 300, 270, 200, 50, GREEN)
-        self.btn_quit = Button("Quitter", 300, 340, 200, 50, RED)
-        
-        self.btn_class_warrior = Button("Guerrier", 150, 300, 150, 100, RED, "Guerrier")
-        self.btn_class_tank = Button("Tank", 325, 300, 150, 100, GRAY, "Tank")
-        self.btn_class_mage = Button("Mage", 500, 300, 150, 100, BLUE, "Mage")
-        self.class_buttons = [self.btn_class_warrior, self.btn_class_tank, self.btn_class_mage]
-
-        self.btn_confirm_name = Button("Lancer l'aventure", 300, 450, 200, 50, GREEN)
-
-        self.btn_resume = Button("Reprendre", 250, 430, 300, 50, GREEN)
-        self.btn_back_stats = Button("Choisir un autre", 250, 490, 300, 40, GRAY)
-        self.btn_delete = Button("[X] Mort Definitive", 550, 530, 180, 40, DARK_RED)
-
-        self.btn_explore = Button("Explorer (Combat)", 50, 450, 200, 50, RED)
-        self.btn_rest = Button("Se Reposer (+10PV)", 270, 450, 220, 50, GREEN)
-        self.btn_inventory = Button("Sac a Dos", 270, 380, 150, 50, PURPLE)
-        self.btn_equip_menu = Button("EQUIP", 430, 380, 60, 50, GOLD)
-        
-        self.btn_merchant = Button("Marchand ($)", 600, 380, 150, 50, CYAN)
-        
-        self.btn_save = Button("Sauvegarder", 510, 450, 200, 50, BLUE)
-        
-        self.btn_settings = Button("[OPT]", 730, 10, 60, 40, GRAY)
-
-        self.btn_set_fs = Button("Plein Ecran : OFF", 250, 200, 300, 50, BLUE)
-        self.btn_set_menu = Button("Menu Principal", 250, 270, 300, 50, RED)
-        self.btn_set_back = Button("Retour au Jeu", 250, 340, 300, 50, GREEN)
-
-        self.btn_back_inv = Button("Retour Camp", 300, 530, 200, 40, GRAY)
-        self.btn_attack = Button("ATTAQUER", 200, 450, 200, 60, RED)
-        self.btn_flee = Button("FUIR >>", 420, 450, 180, 60, ORANGE)
-        self.btn_back_load = Button("Retour Menu", 300, 520, 200, 40, GRAY)
-        
-        self.equip_slots_buttons = {
-            "head": Button("Tete", 350, 150, 100, 60, DARK_BLUE, "head"),
-            "chest": Button("Plastron", 350, 220, 100, 60, DARK_BLUE, "chest"),
-            "legs": Button("Jambes", 350, 290, 100, 60, DARK_BLUE, "legs"),
-            "feet": Button("Pieds", 350, 360, 100, 60, DARK_BLUE, "feet"),
-            "weapon": Button("Arme", 230, 220, 100, 60, RED, "weapon"),
-            "ring": Button("Bague", 470, 220, 100, 60, GOLD, "ring")
-        }
-
-    def refresh_save_list(self):
-        self.save_files_buttons = []
-        if os.path.exists(SAVES_DIR):
-            files = [f for f in os.listdir(SAVES_DIR) if f.endswith('.json')]
-            for i, filename in enumerate(files[:6]):
-                display_name = filename[:-5]
-                btn = Button(display_name, 200, 100 + (i * 60), 400, 50, GOLD, data=filename)
-                self.save_files_buttons.append(btn)
-
-    def refresh_inventory_ui(self):
-        self.item_buttons = []
-        if self.player:
-            if self.state == "INVENTORY":
-                start_x, start_y = 50, 100; col_width = 240; row_height = 100; cols = 3
-                for i, item in enumerate(self.player.inventory):
-                    row = i // cols; col = i % cols
-                    x = start_x + (col * col_width); y = start_y + (row * row_height)
-                    
-                    cat = item.get("cat", "consommable")
-                    col_btn = BLUE if cat == "consommable" else PURPLE
-                    
-                    btn = Button(item["name"], x, y, 220, 80, col_btn, data=(item, i))
-                    self.item_buttons.append(btn)
-            
-            elif self.state == "EQUIP_MENU":
-                start_x = 50; start_y = 120; row = 0
-                for i, item in enumerate(self.player.inventory):
-                    cat = item.get("cat", "consommable")
-                    if cat == "equipment":
-                        x = start_x; y = start_y + (row * 60)
-                        btn = Button(item["name"], x, y, 160, 50, PURPLE, data=(item, i))
-                        self.item_buttons.append(btn); row += 1
-            
-            elif self.state == "MERCHANT":
-                start_x, start_y = 50, 100; col_width = 240; row_height = 100; cols = 3
-                self.generate_shop()
-                for i, item in enumerate(self.shop_items):
-                    row = i // cols; col = i % cols
-                    x = start_x + (col * col_width); y = start_y + (row * row_height)
-                    
-                    price = item.get("price", 10)
-                    can_afford = self.player.gold >= price
-                    col_btn = CYAN if can_afford else GRAY
-                    
-                    btn_text = f"{item['name']} ({price} $)"
-                    btn = Button(btn_text, x, y, 220, 80, col_btn, data=(item, i))
-                    if not can_afford: btn.disabled = True
-                    
-                    self.item_buttons.append(btn)
-
-    def draw_text_centered(self, text, font, y, color=WHITE):
-        surf = font.render(text, True, color)
-        rect = surf.get_rect(center=(GAME_WIDTH//2, y)) # Utilise GAME_WIDTH au lieu de SCREEN_WIDTH
-        game_surface.blit(surf, rect)
-
-    def draw_logs(self):
-        pygame.draw.rect(game_surface, (20, 20, 20), (0, 520, GAME_WIDTH, 80))
-        pygame.draw.line(game_surface, WHITE, (0, 520), (GAME_WIDTH, 520), 2)
-        for i, log in enumerate(self.logs[:3]):
-            surf = FONT_SMALL.render(f"> {log}", True, LIGHT_GRAY)
-            game_surface.blit(surf, (20, 530 + i * 20))
-
-    def save_current_game(self):
-        if self.player:
-            safe_name = "".join([c for c in self.player.name if c.isalnum() or c in (' ', '_')]).strip()
-            filename = f"{safe_name}.json"
-            filepath = os.path.join(SAVES_DIR, filename)
-            try:
-                with open(filepath, 'w') as f: json.dump(self.player.to_dict(), f, indent=4)
-                self.add_log(f"Sauvegarde auto.")
-            except Exception as e: print(e)
-
-    def delete_current_save(self):
-        if self.player:
-            safe_name = "".join([c for c in self.player.name if c.isalnum() or c in (' ', '_')]).strip()
-            filename = f"{safe_name}.json"
-            filepath = os.path.join(SAVES_DIR, filename)
-            try:
-                if os.path.exists(filepath): os.remove(filepath)
-            except Exception as e: print(e)
-
-    def spawn_enemy(self):
-        floor = self.player.floor; kills = self.player.kills
-        if kills >= 10:
-            boss_data = FLOOR_BOSSES.get(floor, ("[BOSS] INCONNU", 1000, 50, 50))
-            name, hp, atk, defense = boss_data
-            self.enemy = Enemy(name, hp, atk, defense, is_boss=True)
-            self.add_log(f"[!] BOSS ETAGE {floor}: {name} !")
-        else:
-            safe_floor = min(floor, 5) 
-            possible_mobs = FLOOR_ENEMIES.get(safe_floor)
-            name, base_hp, base_atk, base_def = random.choice(possible_mobs)
-            factor = random.uniform(0.8, 1.2)
-            infinite_scaling = 1 + (max(0, floor - 5) * 0.2)
-            final_hp = int(base_hp * factor * infinite_scaling)
-            final_atk = int(base_atk * factor * infinite_scaling)
-            final_def = int(base_def * factor * infinite_scaling)
-            self.enemy = Enemy(name, final_hp, final_atk, final_def, is_boss=False)
-            self.add_log(f"[!] {name} (Niv.{floor}) apparait !")
-
-    def run(self):
-        while True:
-            # 1. Gestion du MOUSE SCALING
-            # On récupère la taille réelle de la fenêtre
-            window_w, window_h = real_window.get_size()
-            
-            # On calcule le ratio (Echelle)
-            scale_x = window_w / GAME_WIDTH
-            scale_y = window_h / GAME_HEIGHT
-            
-            # Position brute de la souris sur l'écran
-            raw_mx, raw_my = pygame.mouse.get_pos()
-            
-            # Position convertie dans le jeu (800x600)
-            mouse_x = int(raw_mx / scale_x)
-            mouse_y = int(raw_my / scale_y)
-            pos = (mouse_x, mouse_y)
-            
-            # On crée un faux event mouse pour tromper les boutons si besoin, 
-            # mais ici on modifie directement 'event.pos' dans la boucle event
-            
-            events = pygame.event.get()
-            current_time = pygame.time.get_ticks() 
-            
-            for event in events:
-                if event.type == pygame.QUIT: pygame.quit(); sys.exit()
-                
-                # IMPORTANT : On corrige la position de la souris dans l'événement
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    event.pos = pos
-                
-                if event.type == pygame.MOUSEWHEEL and self.state in ["INVENTORY", "EQUIP_MENU", "MERCHANT"]:
-                    self.inv_scroll_y += event.y * 30
-                    if self.inv_scroll_y > 0: self.inv_scroll_y = 0
-
-                if self.state in ["CAMP", "STATS_VIEW", "INVENTORY", "EQUIP_MENU", "MERCHANT", "COMBAT"]:
-                    if self.btn_settings.is_clicked(event):
-                        self.previous_state = self.state
-                        self.state = "SETTINGS"
-
-            # 2. DESSIN SUR LA SURFACE VIRTUELLE (game_surface) au lieu de l'écran direct
-            game_surface.fill(BLACK)
-
-            if self.state == "MENU":
-                self.draw_text_centered("DONJON INFINI", FONT_TITLE, 100, GOLD)
-                for btn in [self.btn_new, self.btn_load_menu, self.btn_quit]:
-                    btn.check_hover(pos); btn.draw(game_surface)
-                
-                for event in events:
-                    if self.btn_new.is_clicked(event):
-                        self.state = "INPUT_NAME"; self.input_text = ""; self.selected_class = "Guerrier"
-                    if self.btn_load_menu.is_clicked(event): self.refresh_save_list(); self.state = "LOAD_MENU"
-                    if self.btn_quit.is_clicked(event): pygame.quit(); sys.exit()
-
-            elif self.state == "SETTINGS":
-                self.draw_text_centered("PARAMETRES", FONT_TITLE, 100, WHITE)
-                
-                txt_fs = "Plein Ecran : ON" if self.is_fullscreen else "Plein Ecran : OFF"
-                self.btn_set_fs.text = txt_fs
-                
-                for btn in [self.btn_set_fs, self.btn_set_menu, self.btn_set_back]:
-                    btn.check_hover(pos); btn.draw(game_surface)
-
-                for event in events:
-                    if self.btn_set_fs.is_clicked(event):
-                        self.toggle_fullscreen()
-                    if self.btn_set_menu.is_clicked(event):
-                        self.save_current_game()
-                        self.state = "MENU"
-                    if self.btn_set_back.is_clicked(event):
-                        self.state = self.previous_state
-
-            elif self.state == "INPUT_NAME":
-                self.draw_text_centered("Creation du Personnage", FONT_TITLE, 50)
-                self.draw_text_centered("Nom du Heros :", FONT_TEXT, 120)
-                pygame.draw.rect(game_surface, WHITE, (250, 140, 300, 40), 2)
-                txt_surf = FONT_TEXT.render(self.input_text, True, WHITE)
-                game_surface.blit(txt_surf, (260, 150))
-                self.draw_text_centered("Choisissez votre Classe :", FONT_TEXT, 250)
-                for btn in self.class_buttons:
-                    btn.selected = (btn.data == self.selected_class)
-                    btn.check_hover(pos); btn.draw(game_surface)
-                    if btn.data == "Guerrier":   desc = "PV:100 ATK:15 DEF:5"
-                    elif btn.data == "Tank":     desc = "PV:120 ATK:10 DEF:12"
-                    elif btn.data == "Mage":     desc = "PV:70 ATK:22 DEF:3"
-                    game_surface.blit(FONT_SMALL.render(desc, True, WHITE), (btn.rect.x + 10, btn.rect.y + 110))
-                self.btn_confirm_name.check_hover(pos); self.btn_confirm_name.draw(game_surface)
-                for event in events:
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_BACKSPACE: self.input_text = self.input_text[:-1]
-                        elif len(self.input_text) < 15 and event.unicode.isalnum(): self.input_text += event.unicode
-                    for btn in self.class_buttons:
-                        if btn.is_clicked(event): self.selected_class = btn.data
-                    if self.btn_confirm_name.is_clicked(event) and self.input_text:
-                        if self.selected_class == "Guerrier": hp=100; atk=15; defense=5
-                        elif self.selected_class == "Tank":   hp=120; atk=10; defense=12
-                        elif self.selected_class == "Mage":   hp=70;  atk=22; defense=3
-                        self.player = Character(self.input_text, hp, atk, defense, self.selected_class)
-                        self.state = "CAMP"; self.save_current_game()
-
-            elif self.state == "LOAD_MENU":
-                self.draw_text_centered("CHOIX DU PERSONNAGE", FONT_TITLE, 50, WHITE)
-                for btn in self.save_files_buttons: btn.check_hover(pos); btn.draw(game_surface)
-                self.btn_back_load.check_hover(pos); self.btn_back_load.draw(game_surface)
-                for event in events:
-                    if self.btn_back_load.is_clicked(event): self.state = "MENU"
-                    for btn in self.save_files_buttons:
-                        if btn.is_clicked(event):
-                            try:
-                                with open(os.path.join(SAVES_DIR, btn.data), 'r') as f:
-                                    self.player = Character.from_dict(json.load(f))
-                                self.state = "STATS_VIEW"
-                            except Exception as e: print(e)
-
-            elif self.state == "STATS_VIEW":
-                pygame.draw.rect(game_surface, DARK_BLUE, (100, 80, 600, 380), border_radius=15)
-                pygame.draw.rect(game_surface, GOLD, (100, 80, 600, 380), 3, border_radius=15)
-                self.draw_text_centered(f"FICHE DU HERO", FONT_TITLE, 130, GOLD)
-                p = self.player
-                self.draw_text_centered(f"{p.name} - {p.job_class}", FONT_SUBTITLE, 200)
-                game_surface.blit(FONT_TEXT.render(f"[PV] Sante : {p.hp}/{p.max_hp}", True, WHITE), (250, 260))
-                game_surface.blit(FONT_TEXT.render(f"[ATK] Attaque : {p.attack_value}", True, WHITE), (250, 300))
-                block_pct = min(60, p.defense_value * 2)
-                game_surface.blit(FONT_TEXT.render(f"[DEF] Defense : {p.defense_value} ({block_pct}%)", True, WHITE), (250, 340))
-                game_surface.blit(FONT_TEXT.render(f"[ETAGE] Etage : {p.floor}  |  [KILLS] : {p.kills}/10", True, ORANGE), (250, 380))
-                game_surface.blit(FONT_TEXT.render(f"($) Or : {p.gold}", True, GOLD), (250, 420))
-                
-                self.btn_resume.check_hover(pos); self.btn_resume.draw(game_surface)
-                self.btn_back_stats.check_hover(pos); self.btn_back_stats.draw(game_surface)
-                self.btn_settings.check_hover(pos); self.btn_settings.draw(game_surface)
-                self.btn_delete.check_hover(pos); self.btn_delete.draw(game_surface)
-
-                for event in events:
-                    if self.btn_resume.is_clicked(event): self.state = "CAMP"
-                    if self.btn_back_stats.is_clicked(event): self.state = "LOAD_MENU"
-                    if self.btn_delete.is_clicked(event):
-                        self.delete_current_save(); self.player = None; self.refresh_save_list(); self.state = "LOAD_MENU"
-
-            elif self.state == "INVENTORY":
-                self.draw_text_centered("SAC A DOS", FONT_TITLE, 50, PURPLE)
-                self.draw_text_centered(f"($) Or: {self.player.gold}", FONT_TEXT, 90, GOLD)
-                
-                clip_rect = pygame.Rect(0, 100, GAME_WIDTH, 420)
-                game_surface.set_clip(clip_rect)
-                for btn in self.item_buttons:
-                    btn.check_hover(pos, self.inv_scroll_y); btn.draw(game_surface, self.inv_scroll_y)
-                    if btn.hover:
-                         item, _ = btn.data
-                         desc_txt = FONT_SMALL.render(item.get("desc",""), True, GOLD)
-                         game_surface.blit(desc_txt, (btn.rect.x, btn.rect.y + 55 + self.inv_scroll_y))
-                game_surface.set_clip(None)
-                
-                pygame.draw.rect(game_surface, GRAY, (780, 100, 10, 420))
-                pygame.draw.rect(game_surface, WHITE, (780, 100 - (self.inv_scroll_y / 5), 10, 30))
-
-                self.btn_back_inv.check_hover(pos); self.btn_back_inv.draw(game_surface)
-                self.btn_settings.check_hover(pos); self.btn_settings.draw(game_surface)
-                for event in events:
-                    if self.btn_back_inv.is_clicked(event): self.state = "CAMP"; self.inv_scroll_y = 0
-                    for btn in self.item_buttons:
-                        if btn.is_clicked(event, self.inv_scroll_y, check_bounds=True):
-                            item, index = btn.data
-                            cat = item.get("cat", "consommable")
-                            if cat == "consommable":
-                                if item["type"] == "heal": self.add_log(self.player.heal(item["val"]))
-                                elif item["type"] == "atk": self.player.base_attack += item["val"]; self.add_log(f"+{item['val']} Base ATK")
-                                elif item["type"] == "def": self.player.base_defense += item["val"]; self.add_log(f"+{item['val']} Base DEF")
-                                self.player.inventory.pop(index); self.refresh_inventory_ui(); self.save_current_game()
-                            else:
-                                self.add_log("C'est un equipement, allez dans le menu EQUIP.")
-                            break
-
-            elif self.state == "EQUIP_MENU":
-                self.draw_text_centered("EQUIPEMENT DU HERO", FONT_TITLE, 50, GOLD)
-                
-                clip_rect = pygame.Rect(0, 100, 250, 420)
-                game_surface.set_clip(clip_rect)
-                if not self.item_buttons:
-                    game_surface.blit(FONT_SMALL.render("Pas d'equipement...", True, GRAY), (50, 120 + self.inv_scroll_y))
-                
-                for btn in self.item_buttons:
-                    btn.check_hover(pos, self.inv_scroll_y); btn.draw(game_surface, self.inv_scroll_y)
-                    if btn.hover:
-                        item, _ = btn.data
-                        desc = item.get("desc", "")
-                        game_surface.blit(FONT_SMALL.render(desc, True, GOLD), (btn.rect.right + 10, btn.rect.y + 15 + self.inv_scroll_y))
-
-                game_surface.set_clip(None)
-
-                for slot_name, btn in self.equip_slots_buttons.items():
-                    equipped_item = self.player.equipment.get(slot_name)
-                    if equipped_item:
-                        d_text = equipped_item["name"]
-                        if len(d_text) > 10: d_text = d_text[:8] + ".."
-                        btn.text = d_text
-                        btn.color = GREEN
-                    else:
-                        btn.text = slot_name.upper()
-                        btn.color = DARK_BLUE
-                    btn.check_hover(pos); btn.draw(game_surface)
-
-                self.btn_back_inv.check_hover(pos); self.btn_back_inv.draw(game_surface)
-                self.btn_settings.check_hover(pos); self.btn_settings.draw(game_surface)
-
-                for event in events:
-                    if self.btn_back_inv.is_clicked(event): self.state = "CAMP"; self.inv_scroll_y = 0
-                    
-                    for btn in self.item_buttons:
-                         if btn.is_clicked(event, self.inv_scroll_y, check_bounds=True):
-                            item, index = btn.data
-                            msg = self.player.equip_item(index)
-                            self.add_log(msg)
-                            self.refresh_inventory_ui()
-                            self.save_current_game()
-                            break
-                    
-                    for slot_name, btn in self.equip_slots_buttons.items():
-                        if btn.is_clicked(event):
-                            msg = self.player.unequip_item(slot_name)
-                            self.add_log(msg)
-                            self.refresh_inventory_ui()
-                            self.save_current_game()
-
-            elif self.state == "MERCHANT":
-                self.draw_text_centered("MARCHAND ITINERANT", FONT_TITLE, 50, CYAN)
-                self.draw_text_centered(f"Votre Or: {self.player.gold} ($)", FONT_SUBTITLE, 90, GOLD)
-                
-                clip_rect = pygame.Rect(0, 120, GAME_WIDTH, 400)
-                game_surface.set_clip(clip_rect)
-                for btn in self.item_buttons:
-                    btn.check_hover(pos, self.inv_scroll_y); btn.draw(game_surface, self.inv_scroll_y)
-                    if btn.hover:
-                         item, _ = btn.data
-                         desc_txt = FONT_SMALL.render(item.get("desc","") + f" (Prix: {item['price']})", True, WHITE)
-                         game_surface.blit(desc_txt, (btn.rect.x, btn.rect.y + 60 + self.inv_scroll_y))
-                game_surface.set_clip(None)
-
-                self.btn_back_inv.check_hover(pos); self.btn_back_inv.draw(game_surface)
-                self.btn_settings.check_hover(pos); self.btn_settings.draw(game_surface)
-
-                for event in events:
-                    if self.btn_back_inv.is_clicked(event): self.state = "CAMP"; self.inv_scroll_y = 0
-                    for btn in self.item_buttons:
-                        if btn.is_clicked(event, self.inv_scroll_y, check_bounds=True):
-                            item, index = btn.data
-                            price = item.get("price", 999)
-                            if self.player.gold >= price:
-                                self.player.gold -= price
-                                bought_item = item.copy()
-                                self.player.inventory.append(bought_item)
-                                self.add_log(f"Achete : {item['name']}")
-                                self.refresh_inventory_ui()
-                                self.save_current_game()
-                            else:
-                                self.add_log("Pas assez d'or !")
-            
-            elif self.state == "CAMP":
-                self.draw_text_centered(f"ETAGE {self.player.floor}", FONT_TITLE, 80)
-                self.draw_text_centered(f"{self.player.name} (PV: {self.player.hp}/{self.player.max_hp})", FONT_SUBTITLE, 140, GREEN)
-                self.draw_text_centered(f"($) Or: {self.player.gold}", FONT_TEXT, 170, GOLD)
-                
-                prog = min(1.0, self.player.kills / 10)
-                pygame.draw.rect(game_surface, GRAY, (250, 190, 300, 20))
-                pygame.draw.rect(game_surface, ORANGE, (250, 190, 300 * prog, 20))
-                game_surface.blit(FONT_SMALL.render(f"Boss: {self.player.kills}/10", True, WHITE), (350, 192))
-
-                time_left = self.next_rest_time - current_time
-                if time_left > 0: self.btn_rest.text = f"Repos ({time_left//1000}s)"; self.btn_rest.disabled = True
-                else: self.btn_rest.text = "Se Reposer (+10PV)"; self.btn_rest.disabled = False
-                
-                for btn in [self.btn_explore, self.btn_rest, self.btn_inventory, self.btn_save, self.btn_equip_menu, self.btn_merchant]:
-                    btn.check_hover(pos); btn.draw(game_surface)
-                self.btn_settings.check_hover(pos); self.btn_settings.draw(game_surface)
-                self.draw_logs()
-
-                for event in events:
-                    if self.btn_explore.is_clicked(event):
-                        self.spawn_enemy(); self.state = "COMBAT"
-                    if self.btn_rest.is_clicked(event):
-                        self.add_log(self.player.heal(10)); self.next_rest_time = current_time + 60000 
-                    if self.btn_save.is_clicked(event): self.save_current_game()
-                    
-                    if self.btn_inventory.is_clicked(event):
-                        self.state = "INVENTORY"; self.refresh_inventory_ui()
-                    if self.btn_equip_menu.is_clicked(event):
-                        self.state = "EQUIP_MENU"; self.refresh_inventory_ui()
-                    if self.btn_merchant.is_clicked(event):
-                        self.state = "MERCHANT"; self.refresh_inventory_ui()
-
-            elif self.state == "COMBAT":
-                self.draw_text_centered("COMBAT", FONT_TITLE, 50, RED)
-                pygame.draw.rect(game_surface, BLUE, (100, 150, 200, 200), border_radius=10)
-                self.draw_text_centered(self.player.name, FONT_TEXT, 130)
-                game_surface.blit(FONT_TEXT.render(f"PV: {self.player.hp}", True, WHITE), (150, 230))
-                
-                col_enn = GOLD if self.enemy.is_boss else GRAY
-                pygame.draw.rect(game_surface, col_enn, (500, 150, 200, 200), border_radius=10)
-                game_surface.blit(FONT_TEXT.render(self.enemy.name, True, WHITE), (530, 120))
-                game_surface.blit(FONT_TEXT.render(f"PV: {self.enemy.hp}", True, WHITE), (550, 230))
-
-                self.btn_attack.check_hover(pos); self.btn_attack.draw(game_surface)
-                self.btn_flee.check_hover(pos); self.btn_flee.draw(game_surface)
-                self.btn_settings.check_hover(pos); self.btn_settings.draw(game_surface)
-                self.draw_logs()
-
-                for event in events:
-                    if self.btn_attack.is_clicked(event):
-                        self.add_log(self.player.attack_target(self.enemy))
-                        if not self.enemy.is_alive():
-                            # VICTOIRE
-                            gold_gain = 5
-                            if random.random() < 0.2:
-                                gold_gain += 15
-                                self.add_log("($) Bourse trouvee ! (+15 Or)")
-                            
-                            self.player.gold += gold_gain
-                            self.add_log(f"Gain: +{gold_gain} Or")
-                            
-                            if self.enemy.is_boss:
-                                self.player.floor += 1; self.player.kills = 0
-                                self.add_log("[!] BOSS VAINCU ! ETAGE SUIVANT !")
-                                for loot in BOSS_LOOT:
-                                    self.player.inventory.append(loot.copy())
-                            else:
-                                self.player.kills += 1
-                                self.add_log(f"Ennemi vaincu ({self.player.kills}/10)")
-                                if random.random() < 0.35:
-                                    if random.random() < 0.7:
-                                        loot_item = random.choice(POSSIBLE_CONSUMABLES).copy()
-                                    else:
-                                        loot_item = random.choice(POSSIBLE_EQUIPMENT).copy()
-                                    self.player.inventory.append(loot_item)
-                                    self.add_log(f"Loot: {loot_item['name']}")
-                            self.state = "CAMP"; self.save_current_game()
-                        else:
-                            dmg, blocked = self.player.take_damage(self.enemy.attack_value)
-                            block_msg = " [BLOQUE]" if blocked else ""
-                            self.add_log(f"RIPOSTE : -{dmg} PV{block_msg}")
-                            if not self.player.is_alive(): self.state = "MENU"
-                    
-                    if self.btn_flee.is_clicked(event):
-                        if self.enemy.is_boss:
-                            self.add_log("[!] Impossible de fuir un BOSS !")
-                            dmg, blocked = self.player.take_damage(self.enemy.attack_value)
-                            self.add_log(f"Attaque Gratuite : -{dmg} PV")
-                            if not self.player.is_alive(): self.state = "MENU"
-                        elif random.random() < 0.5:
-                            self.add_log(">> Fuite reussie !"); self.state = "CAMP"
-                        else:
-                            self.add_log("[!] Fuite ratee !")
-                            dmg, blocked = self.player.take_damage(self.enemy.attack_value)
-                            self.add_log(f"Coups recus : -{dmg} PV")
-                            if not self.player.is_alive(): self.state = "MENU"
-
-            # 3. UPSCALING FINAL (Le secret du plein écran propre)
-            scaled_surface = pygame.transform.scale(game_surface, real_window.get_size())
-            real_window.blit(scaled_surface, (0, 0))
-
-            pygame.display.flip()
-            CLOCK.tick(60)
-
-if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+import pygame
+import sys
+import json
+import os
+import math
+import time
+from collections import OrderedDict, deque
+
+# Regles du jeu (sans pygame) : jeu20.py n'est que l'interface
+import core
+from core import CLASS_STATS, LOADOUT_OBJECTIVES, Character, best_loadout, sell_price
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVES_DIR = os.path.join(BASE_DIR, "saves")
+if not os.path.exists(SAVES_DIR):
+    os.makedirs(SAVES_DIR)
+
+# --- INIT PYGAME ---
+# Mode sans fenetre (benchmarks, machines sans ecran) : pilote video factice de SDL
+if os.environ.get("RPG_HEADLESS") == "1":
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+pygame.init()
+
+# Résolution logique du jeu (Interne)
+GAME_WIDTH, GAME_HEIGHT = 800, 600
+
+# Fenêtre réelle (Au départ en 800x600 fenêtré)
+real_window = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT), pygame.RESIZABLE)
+
+# Surface "Virtuelle" (C'est là qu'on dessine le jeu)
+# Convertie au format de l'écran pour pouvoir être agrandie directement dedans
+game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT)).convert()
+
+pygame.display.set_caption("Mini RPG - Fullscreen Scaled")
+CLOCK = pygame.time.Clock()
+
+# --- COULEURS & FONTS ---
+WHITE = (255, 255, 255); BLACK = (10, 10, 10); GRAY = (50, 50, 50)
+LIGHT_GRAY = (170, 170, 170); RED = (200, 50, 50); DARK_RED = (100, 0, 0)
+GREEN = (50, 200, 50); BLUE = (50, 50, 200); GOLD = (218, 165, 32)
+PURPLE = (128, 0, 128); DARK_BLUE = (20, 20, 50); ORANGE = (255, 140, 0)
+CYAN = (0, 255, 255)
+
+FONT_TITLE = pygame.font.SysFont("Arial", 40, bold=True)
+FONT_SUBTITLE = pygame.font.SysFont("Arial", 28, bold=True)
+FONT_TEXT = pygame.font.SysFont("Arial", 20)
+FONT_SMALL = pygame.font.SysFont("Arial", 16)
+
+# --- CACHE DE TEXTE ---
+# Les memes textes sont re-rendus 60 fois par seconde : on garde les surfaces
+# deja rendues (LRU borne en nombre d'entrees ET en octets).
+class TextCache:
+    def __init__(self, max_entries=512, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # (font, text, antialias, color) -> (surface, octets)
+        self.total_bytes = 0
+        self.hits = 0; self.misses = 0; self.evictions = 0
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, antialias, tuple(color))
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        size = surf.get_bytesize() * surf.get_width() * surf.get_height()
+        self.entries[key] = (surf, size)
+        self.total_bytes += size
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+            self.evictions += 1
+        return surf
+
+    def clear(self):
+        self.entries.clear(); self.total_bytes = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.entries), "bytes": self.total_bytes}
+
+TEXT_CACHE = TextCache()
+
+def render_text(font, text, color=WHITE, antialias=True):
+    # Les surfaces renvoyees sont partagees : ne jamais les modifier, seulement les blitter
+    return TEXT_CACHE.render(font, text, antialias, color)
+
+def draw_win_chance(canvas, chance, label, pos, centered=False):
+    # chance : core.OUTCOME_CACHE.win_chance (None = calcul en cours)
+    if chance is None: text, color = f"{label} : ...", WHITE
+    else:
+        pct = "<1%" if 0 < chance < 0.01 else ">99%" if 0.99 < chance < 1 else f"{chance:.0%}"
+        text, color = f"{label} : {pct}", GREEN if chance >= 0.7 else ORANGE if chance >= 0.4 else RED
+    surf = render_text(FONT_SMALL, text, color)
+    if centered: pos = (pos[0] - surf.get_width() // 2, pos[1])
+    canvas.blit(surf, pos)
+
+# --- RENDU (rectangles sales) ---
+# Tout le dessin passe par le Renderer. En mode normal il dessine directement.
+# En mode "rectangles sales" (opt-in) il enregistre chaque appel de dessin
+# sous forme de tuple, compare avec la frame precedente et ne redessine
+# (puis ne pousse a l'ecran) que les zones qui ont change.
+def merge_rects(rects):
+    merged = []
+    for r in rects:
+        r = r.copy()
+        i = r.collidelist(merged)
+        while i != -1:
+            r.union_ip(merged.pop(i))
+            i = r.collidelist(merged)
+        merged.append(r)
+    return merged
+
+class Renderer:
+    FULL_REDRAW_RATIO = 0.5  # au-dela de cette surface sale, on redessine tout
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.screen_rect = surface.get_rect()
+        self.dirty_mode = False
+        self.ops = []; self.prev_ops = []
+        self.clip = None
+        self.extra_dirty = []
+        self.needs_full = True
+        self.draw_calls = 0
+
+    def set_dirty_mode(self, enabled):
+        self.dirty_mode = enabled
+        self.ops = []; self.prev_ops = []
+        self.invalidate()
+
+    def invalidate(self):
+        self.needs_full = True
+
+    def mark_dirty(self, rect):
+        self.extra_dirty.append(pygame.Rect(rect))
+
+    def begin_frame(self):
+        self.prev_ops, self.ops = self.ops, []
+        self.clip = None; self.draw_calls = 0
+
+    # Primitives de dessin (meme signature que pygame, sans la surface)
+    def fill(self, color):
+        self._push(("fill", color, self.clip))
+
+    def rect(self, color, rect, width=0, border_radius=0):
+        self._push(("rect", color, tuple(pygame.Rect(rect)), width, border_radius, self.clip))
+
+    def line(self, color, start, end, width=1):
+        self._push(("line", color, tuple(start), tuple(end), width, self.clip))
+
+    def blit(self, surf, dest):
+        if isinstance(dest, pygame.Rect): dest = dest.topleft
+        self._push(("blit", surf, (int(dest[0]), int(dest[1])), self.clip))
+
+    def set_clip(self, rect):
+        self.clip = tuple(pygame.Rect(rect)) if rect is not None else None
+        if not self.dirty_mode: self.surface.set_clip(rect)
+
+    def _push(self, op):
+        if self.dirty_mode: self.ops.append(op)
+        else: self._draw(op)
+
+    def _draw(self, op):
+        kind = op[0]
+        if kind == "blit": self.surface.blit(op[1], op[2])
+        elif kind == "rect": pygame.draw.rect(self.surface, op[1], op[2], op[3], border_radius=op[4])
+        elif kind == "fill": self.surface.fill(op[1])
+        elif kind == "line": pygame.draw.line(self.surface, op[1], op[2], op[3], op[4])
+        self.draw_calls += 1
+
+    def _bounds(self, op):
+        kind = op[0]
+        if kind == "blit": r = pygame.Rect(op[2], op[1].get_size())
+        elif kind == "rect": r = pygame.Rect(op[2])
+        elif kind == "fill": r = self.screen_rect.copy()
+        else:
+            (x1, y1), (x2, y2) = op[2], op[3]
+            r = pygame.Rect(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1).inflate(op[4] + 1, op[4] + 1)
+        clip = op[-1]
+        return r.clip(clip) if clip else r.clip(self.screen_rect)
+
+    # Renvoie None en mode normal (tout presenter), sinon la liste des zones redessinees
+    def end_frame(self):
+        if not self.dirty_mode:
+            self.surface.set_clip(None)
+            return None
+
+        if self.needs_full:
+            rects = [self.screen_rect.copy()]
+        elif self.ops == self.prev_ops and not self.extra_dirty:
+            return []
+        else:
+            changed = set(self.prev_ops).symmetric_difference(self.ops)
+            rects = [self._bounds(op) for op in changed] + self.extra_dirty
+            rects = merge_rects([r for r in rects if r.w > 0 and r.h > 0])
+            area = sum(r.w * r.h for r in rects)
+            if area > self.FULL_REDRAW_RATIO * self.screen_rect.w * self.screen_rect.h:
+                rects = [self.screen_rect.copy()]
+        self.needs_full = False; self.extra_dirty = []
+
+        for dirty in rects:
+            for op in self.ops:
+                clip = op[-1]
+                area = dirty.clip(clip) if clip else dirty
+                if area.w == 0 or area.h == 0: continue
+                if not self._bounds(op).colliderect(area): continue
+                self.surface.set_clip(area)
+                self._draw(op)
+        self.surface.set_clip(None)
+        return rects
+
+RENDERER = Renderer(game_surface)
+RENDERER.set_dirty_mode(os.environ.get("RPG_DIRTY_RECTS") == "1")
+
+# --- MISE A L'ECHELLE ---
+# Agrandit game_surface vers la fenetre sans allouer de surface a chaque frame.
+# La destination (fenetre ou tampon) n'est reconstruite que si la fenetre change.
+class Scaler:
+    def __init__(self, source):
+        self.source = source
+        self.window = None; self.size = None
+        self.buffer = None
+        self.scale_x = self.scale_y = 1.0
+        self.integer = False  # fenetre = multiple entier exact de 800x600 (zones sales exactes)
+        self.direct = False   # meme format : on agrandit directement dans la fenetre
+
+    def rebuild(self, window):
+        self.window = window
+        self.size = window.get_size()
+        self.scale_x = self.size[0] / GAME_WIDTH
+        self.scale_y = self.size[1] / GAME_HEIGHT
+        self.integer = self.scale_x.is_integer() and self.scale_y.is_integer()
+        self.direct = (window.get_bitsize() == self.source.get_bitsize()
+                       and window.get_masks() == self.source.get_masks())
+        self.buffer = None if self.direct else pygame.Surface(self.size, 0, self.source)
+
+    def _check(self, window):
+        if window is not self.window or window.get_size() != self.size: self.rebuild(window)
+
+    def scale_full(self, window):
+        self._check(window)
+        # A 1x : simple blit. Aux autres multiples entiers, transform.scale est deja un plus
+        # proche voisin exact ; scale2x (lisse, 3x plus lent) ou un agrandissement par bandes
+        # ne vont pas plus vite : le cout est l'ecriture de l'image agrandie.
+        if self.size == (GAME_WIDTH, GAME_HEIGHT):
+            window.blit(self.source, (0, 0))
+        elif self.direct:
+            pygame.transform.scale(self.source, self.size, window)
+        else:
+            pygame.transform.scale(self.source, self.size, self.buffer)
+            window.blit(self.buffer, (0, 0))
+
+    # Agrandit seulement les zones donnees, renvoie les rectangles fenetre a mettre a jour
+    def scale_rects(self, window, rects):
+        self._check(window)
+        if not self.integer:
+            # Echelle non entiere : une zone agrandie seule n'echantillonne pas comme l'image
+            # entiere (coutures). On agrandit tout, mais on ne pousse que les zones changees.
+            self.scale_full(window)
+            updates = []
+            for r in rects:
+                # Debordement d'un pixel pour couvrir les arrondis
+                r = r.inflate(2, 2).clip(RENDERER.screen_rect)
+                x0 = int(r.x * self.scale_x); y0 = int(r.y * self.scale_y)
+                dest = pygame.Rect(x0, y0, math.ceil(r.right * self.scale_x) - x0, math.ceil(r.bottom * self.scale_y) - y0)
+                dest = dest.clip(window.get_rect())
+                if dest.w and dest.h: updates.append(dest)
+            return updates
+
+        updates = []
+        for r in rects:
+            # Echelle entiere : correspondance pixel exacte, pas de debordement
+            dest = pygame.Rect(int(r.x * self.scale_x), int(r.y * self.scale_y),
+                               int(r.w * self.scale_x), int(r.h * self.scale_y))
+            if dest.w == 0 or dest.h == 0: continue
+
+            src = self.source.subsurface(r)
+            if dest.size == r.size:
+                window.blit(src, dest)
+            elif self.direct:
+                pygame.transform.scale(src, dest.size, window.subsurface(dest))
+            else:
+                target = self.buffer.subsurface(dest)
+                pygame.transform.scale(src, dest.size, target)
+                window.blit(target, dest)
+            updates.append(dest)
+        return updates
+
+SCALER = Scaler(game_surface)
+
+# --- PROFILEUR DE FRAME ---
+# Chronometre chaque phase de la boucle (souris, evenements, logique, dessin,
+# agrandissement, flip) sur une fenetre glissante de frames, avec un histogramme
+# par tranches de ms. Affichable en surimpression (PARAMETRES) et exporte en JSON
+# a la fermeture du jeu.
+class FrameProfiler:
+    PHASES = ("mouse", "events", "logic", "draw", "scale", "flip", "frame")
+    BUCKETS_MS = (1, 2, 4, 8, 16, 33)  # bornes hautes ; au-dela = derniere case
+    BUDGET_MS = 1000 / 60
+
+    def __init__(self, window=600, out_path=None):
+        self.window = window
+        self.out_path = out_path
+        self.enabled = False
+        self.samples = {phase: deque(maxlen=window) for phase in self.PHASES}
+        self.histograms = {phase: [0] * (len(self.BUCKETS_MS) + 1) for phase in self.PHASES}
+        self.over_budget = 0; self.frames = 0
+        self.frame_start = None; self.last_mark = None
+        self.overlay_header = ""; self.overlay_lines = []; self.overlay_footer = ""; self.overlay_age = 0
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.frame_start = self.last_mark = None
+
+    def bucket(self, ms):
+        for i, limit in enumerate(self.BUCKETS_MS):
+            if ms < limit: return i
+        return len(self.BUCKETS_MS)
+
+    def record(self, phase, ms):
+        samples = self.samples[phase]; hist = self.histograms[phase]
+        # Histogramme glissant : la mesure qui sort de la fenetre quitte aussi sa case
+        if len(samples) == samples.maxlen: hist[self.bucket(samples[0])] -= 1
+        samples.append(ms)
+        hist[self.bucket(ms)] += 1
+
+    def begin(self):
+        if not self.enabled: return
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        # Temps ecoule depuis la phase precedente de la meme frame
+        if not self.enabled: return
+        now = time.perf_counter()
+        if self.last_mark is None: self.frame_start = now
+        else: self.record(phase, (now - self.last_mark) * 1000)
+        self.last_mark = now
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None: return
+        ms = (time.perf_counter() - self.frame_start) * 1000
+        self.record("frame", ms)
+        self.frames += 1
+        if ms > self.BUDGET_MS: self.over_budget += 1
+        self.frame_start = self.last_mark = None
+
+    def summary(self, phase):
+        samples = sorted(self.samples[phase])
+        if not samples: return None
+        pick = lambda pct: samples[min(len(samples) - 1, int(pct / 100 * len(samples)))]
+        return {"count": len(samples), "mean_ms": round(sum(samples) / len(samples), 3),
+                "p50_ms": round(pick(50), 3), "p99_ms": round(pick(99), 3), "max_ms": round(samples[-1], 3)}
+
+    def stats(self):
+        labels = [f"<{limit}ms" for limit in self.BUCKETS_MS] + [f">={self.BUCKETS_MS[-1]}ms"]
+        phases = {}
+        for phase in self.PHASES:
+            summary = self.summary(phase)
+            if summary is None: continue
+            summary["histogram"] = dict(zip(labels, self.histograms[phase]))
+            phases[phase] = summary
+        return {"frames": self.frames, "over_budget": self.over_budget, "budget_ms": round(self.BUDGET_MS, 2),
+                "window": self.window, "phases": phases, "text_cache": TEXT_CACHE.stats(),
+                "outcome_cache": core.OUTCOME_CACHE.stats()}
+
+    def dump(self):
+        if not self.out_path or not self.frames: return
+        try:
+            with open(self.out_path, 'w') as f: json.dump(self.stats(), f, indent=4)
+        except Exception as e: print(e)
+
+    def draw(self, canvas):
+        # Les textes ne sont recalcules que toutes les 30 frames (sinon illisibles et
+        # chaque valeur differente remplirait le cache de texte)
+        self.overlay_age -= 1
+        if self.overlay_age <= 0:
+            self.overlay_age = 30
+            self.overlay_header = f"frames > {self.BUDGET_MS:.1f} ms : {self.over_budget}/{self.frames}"
+            self.overlay_lines = []
+            for phase in self.PHASES:
+                s = self.summary(phase)
+                if s is None: continue
+                color = RED if s["p99_ms"] > self.BUDGET_MS else WHITE
+                self.overlay_lines.append((phase, f"{phase:<6} p50 {s['p50_ms']:5.2f}  p99 {s['p99_ms']:5.2f} ms", color))
+            o = core.OUTCOME_CACHE.stats()
+            self.overlay_footer = f"victoire : {o['hits']} hits, {o['misses']} calculs, {o['compute_ms']:.0f} ms"
+
+        canvas.rect((0, 0, 0), (5, 60, 330, 46 + 18 * len(self.overlay_lines)))
+        canvas.blit(render_text(FONT_SMALL, self.overlay_header, GOLD), (10, 65))
+        canvas.blit(render_text(FONT_SMALL, self.overlay_footer, CYAN), (10, 83 + 18 * len(self.overlay_lines)))
+        for i, (phase, text, color) in enumerate(self.overlay_lines, 1):
+            y = 65 + i * 18
+            canvas.blit(render_text(FONT_SMALL, text, color), (10, y))
+            # Mini histogramme : une barre par tranche de ms
+            hist = self.histograms[phase]; total = max(1, sum(hist))
+            for b, count in enumerate(hist):
+                h = int(14 * count / total)
+                if h: canvas.rect(ORANGE if b >= 4 else GREEN, (270 + b * 9, y + 15 - h, 7, h))
+
+PROFILER = FrameProfiler(out_path=os.environ.get("RPG_PROFILE_OUT", os.path.join(BASE_DIR, "profile.json")))
+PROFILER.set_enabled(os.environ.get("RPG_PROFILE") == "1")
+
+# --- INTERFACE ---
+class Button:
+    def __init__(self, text, x, y, w, h, color, data=None):
+        self.rect = pygame.Rect(x, y, w, h)
+        self.text = text; self.color = color; self.data = data
+        self.hover = False; self.disabled = False; self.selected = False
+
+    def draw(self, canvas, offset_y=0):
+        adjusted_rect = self.rect.move(0, offset_y)
+        if self.disabled: draw_col = GRAY
+        elif self.hover: draw_col = (min(self.color[0]+30, 255), min(self.color[1]+30, 255), min(self.color[2]+30, 255))
+        else: draw_col = self.color
+        
+        canvas.rect(draw_col, adjusted_rect, border_radius=8)
+        border_col = GOLD if self.selected else WHITE
+        border_width = 4 if self.selected else 2
+        canvas.rect(border_col, adjusted_rect, border_width, border_radius=8)
+        
+        display_text = self.text
+        if len(display_text) > 18: 
+             display_text = display_text[:16] + ".."
+
+        txt_surf = render_text(FONT_TEXT, display_text, WHITE)
+        txt_rect = txt_surf.get_rect(center=adjusted_rect.center)
+        canvas.blit(txt_surf, txt_rect)
+
+    def check_hover(self, pos, offset_y=0):
+        adjusted_rect = self.rect.move(0, offset_y)
+        if not self.disabled: self.hover = adjusted_rect.collidepoint(pos)
+
+    def is_clicked(self, event, offset_y=0, check_bounds=False):
+        adjusted_rect = self.rect.move(0, offset_y)
+        if self.disabled: return False
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            if adjusted_rect.collidepoint(event.pos):
+                if check_bounds:
+                    if adjusted_rect.bottom < 100 or adjusted_rect.top > 520: return False
+                return True
+        return False
+
+# Index spatial (grille uniforme) des boutons d'un ecran : une position souris
+# ne teste que les quelques boutons de sa cellule au lieu de tout l'ecran.
+class HitGrid:
+    CELL = 64
+
+    def __init__(self, buttons):
+        self.cells = {}
+        for btn in buttons:
+            r = btn.rect
+            for cx in range(r.left // self.CELL, (r.right - 1) // self.CELL + 1):
+                for cy in range(r.top // self.CELL, (r.bottom - 1) // self.CELL + 1):
+                    self.cells.setdefault((cx, cy), []).append(btn)
+
+    def find(self, pos, offset_y=0):
+        x, y = pos[0], pos[1] - offset_y
+        for btn in self.cells.get((x // self.CELL, y // self.CELL), ()):
+            if btn.rect.collidepoint(x, y): return btn
+        return None
+
+# Liste / grille virtualisee : seules les lignes qui croisent la zone visible
+# ont un Button, recycle quand il sort de l'ecran. Le clic est retrouve par
+# calcul (ligne, colonne) au lieu de tester chaque bouton.
+class VirtualList:
+    def __init__(self, x, y, btn_w, btn_h, cols, col_width, row_height, viewport, bind):
+        self.x = x; self.y = y; self.btn_w = btn_w; self.btn_h = btn_h
+        self.cols = cols; self.col_width = col_width; self.row_height = row_height
+        self.viewport = pygame.Rect(viewport)
+        self.bind = bind  # bind(btn, entry) : configure texte / couleur / data du bouton
+        self.entries = []
+        self.live = {}  # index -> Button materialise
+        self.free = []  # Buttons recyclables
+        self.hover_index = None
+
+    def set_entries(self, entries):
+        self.entries = entries
+        self.free.extend(self.live.values()); self.live = {}
+
+    def visible_range(self, scroll_y):
+        top = self.viewport.top - scroll_y - self.y
+        bottom = self.viewport.bottom - scroll_y - self.y
+        first_row = max(0, (top - self.btn_h) // self.row_height + 1)
+        last_row = (bottom - 1) // self.row_height
+        first = int(first_row) * self.cols
+        last = min(len(self.entries), (int(last_row) + 1) * self.cols)
+        return first, max(first, last)
+
+    def visible_buttons(self, scroll_y):
+        first, last = self.visible_range(scroll_y)
+        for i in [i for i in self.live if not first <= i < last]:
+            self.free.append(self.live.pop(i))
+
+        buttons = []
+        for i in range(first, last):
+            btn = self.live.get(i)
+            if btn is None:
+                btn = self.free.pop() if self.free else Button("", 0, 0, self.btn_w, self.btn_h, GRAY)
+                row, col = divmod(i, self.cols)
+                btn.rect.topleft = (self.x + col * self.col_width, self.y + row * self.row_height)
+                btn.hover = False; btn.disabled = False; btn.selected = False
+                self.bind(btn, self.entries[i])
+                btn.hover = (i == self.hover_index) and not btn.disabled
+                self.live[i] = btn
+            buttons.append(btn)
+        return buttons
+
+    def index_at(self, pos, scroll_y):
+        if not self.viewport.collidepoint(pos): return None
+        cx = pos[0] - self.x; cy = pos[1] - scroll_y - self.y
+        if cx < 0 or cy < 0: return None
+        col, dx = divmod(cx, self.col_width); row, dy = divmod(cy, self.row_height)
+        if col >= self.cols or dx >= self.btn_w or dy >= self.btn_h: return None
+        i = int(row) * self.cols + int(col)
+        return i if i < len(self.entries) else None
+
+    def update_hover(self, pos, scroll_y):
+        old = self.live.get(self.hover_index)
+        if old: old.hover = False
+        self.hover_index = self.index_at(pos, scroll_y)
+        btn = self.live.get(self.hover_index)
+        if btn and not btn.disabled: btn.hover = True
+
+    def clicked(self, event, scroll_y):
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1: return None
+        i = self.index_at(event.pos, scroll_y)
+        if i is None: return None
+        btn = self.live.get(i)
+        if btn is None or btn.disabled: return None
+        return btn
+
+# --- MOTEUR ---
+class Game:
+    def __init__(self):
+        self._state = None
+        self.previous_state = "MENU"
+        self.player = None; self.enemy = None
+        self.logs = ["Bienvenue !"]
+        self.shop_items = []
+        self.last_shop_floor = 0
+        self.next_rest_time = 0
+        self.current_time = 0  # horloge de la frame en cours (ms)
+        self.inv_scroll_y = 0
+        
+        # Gestion Fenêtre / Plein Ecran
+        self.is_fullscreen = False
+
+        # Mode veille : sur un ecran statique on dort jusqu'a la prochaine entree
+        self.idle_mode = os.environ.get("RPG_IDLE", "1") != "0"
+        self.pending_redraw = True
+
+        self.backgrounds = {}  # etat -> (cle, surface de fond pre-rendue)
+        self.hover_dirty = True
+        
+        self.setup_ui()
+
+        # Une scene par etat : la boucle ne parle qu'a la scene active
+        self.scenes = {scene.state: scene for scene in (
+            MenuScene(self), SettingsScene(self), InputNameScene(self), LoadMenuScene(self),
+            StatsViewScene(self), InventoryScene(self), EquipScene(self), MerchantScene(self),
+            CampScene(self), CombatScene(self)
+        )}
+        self.scene = None
+        self.state = "MENU"
+
+    # Changer d'etat declenche exit() de l'ancienne scene et enter() de la nouvelle
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, new_state):
+        if new_state == self._state: return
+        if self.scene: self.scene.exit()
+        self._state = new_state
+        self.scene = self.scenes[new_state]
+        self.scene.enter()
+        self.hover_dirty = True
+
+    def open_settings(self):
+        self.previous_state = self.state
+        self.state = "SETTINGS"
+
+    def add_log(self, msg):
+        self.logs.insert(0, msg)
+        if len(self.logs) > 6: self.logs.pop()
+
+    def toggle_fullscreen(self):
+        global real_window
+        self.is_fullscreen = not self.is_fullscreen
+        if self.is_fullscreen:
+            real_window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            real_window = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT), pygame.RESIZABLE)
+        SCALER.rebuild(real_window)
+        RENDERER.invalidate()
+
+    def toggle_dirty_rects(self):
+        RENDERER.set_dirty_mode(not RENDERER.dirty_mode)
+
+    def toggle_profiler(self):
+        PROFILER.set_enabled(not PROFILER.enabled)
+        RENDERER.invalidate()
+
+    def generate_shop(self):
+        if self.player.floor != self.last_shop_floor:
+            self.last_shop_floor = self.player.floor
+            self.shop_items = core.shop_stock(self.player.floor)
+
+    def setup_ui(self):
+        # Boutons partages entre plusieurs scenes (les autres vivent dans leur scene)
+        self.btn_settings = Button("[OPT]", 730, 10, 60, 40, GRAY)
+        self.btn_back_inv = Button("Retour Camp", 300, 530, 200, 40, GRAY)
+
+    def refresh_inventory_ui(self):
+        self.scene.refresh()
+        self.hover_dirty = True
+
+    def commit_batch(self, batch):
+        # Une seule reconstruction de l'UI et une seule sauvegarde par lot
+        applied, msgs = batch.commit()
+        for msg in msgs: self.add_log(msg)
+        if applied:
+            self.refresh_inventory_ui()
+            self.save_current_game()
+        return applied
+
+    def draw_text_centered(self, text, font, y, color=WHITE, canvas=RENDERER):
+        surf = render_text(font, text, color)
+        rect = surf.get_rect(center=(GAME_WIDTH//2, y)) # Utilise GAME_WIDTH au lieu de SCREEN_WIDTH
+        canvas.blit(surf, rect)
+
+    def draw_log_panel(self, canvas):
+        canvas.rect((20, 20, 20), (0, 520, GAME_WIDTH, 80))
+        canvas.line(WHITE, (0, 520), (GAME_WIDTH, 520), 2)
+
+    def draw_logs(self):
+        # Le cadre du journal fait partie du fond statique (draw_log_panel)
+        for i, log in enumerate(self.logs[:3]):
+            surf = render_text(FONT_SMALL, f"> {log}", LIGHT_GRAY)
+            RENDERER.blit(surf, (20, 530 + i * 20))
+
+    # --- FONDS STATIQUES ---
+    # Titres, panneaux et libelles fixes de chaque ecran sont composes une seule
+    # fois dans une surface ; la boucle ne dessine par-dessus que le dynamique.
+    def get_background(self):
+        key = self.scene.background_key()
+        cached = self.backgrounds.get(self.state)
+        if cached is not None and cached[0] == key: return cached[1]
+
+        surf = pygame.Surface((GAME_WIDTH, GAME_HEIGHT)).convert()
+        canvas = Renderer(surf)
+        canvas.fill(BLACK)
+        self.scene.compose_background(canvas)
+        self.backgrounds[self.state] = (key, surf)
+        return surf
+
+    def save_current_game(self):
+        if self.player:
+            safe_name = "".join([c for c in self.player.name if c.isalnum() or c in (' ', '_')]).strip()
+            filename = f"{safe_name}.json"
+            filepath = os.path.join(SAVES_DIR, filename)
+            try:
+                with open(filepath, 'w') as f: json.dump(self.player.to_dict(), f, indent=4)
+                self.add_log(f"Sauvegarde auto.")
+            except Exception as e: print(e)
+
+    def delete_current_save(self):
+        if self.player:
+            safe_name = "".join([c for c in self.player.name if c.isalnum() or c in (' ', '_')]).strip()
+            filename = f"{safe_name}.json"
+            filepath = os.path.join(SAVES_DIR, filename)
+            try:
+                if os.path.exists(filepath): os.remove(filepath)
+            except Exception as e: print(e)
+
+    def spawn_enemy(self):
+        # L'ancien monstre n'est plus reference que par self.enemy : il retourne au pool
+        self.enemy, msg = core.spawn_enemy(self.player, self.enemy)
+        self.add_log(msg)
+
+    # Attente max (ms) avant la prochaine frame : None = dormir jusqu'a une entree,
+    # 0 = quelque chose s'anime, on reste sur la boucle cadencee a 60 FPS
+    def idle_timeout(self, current_time):
+        # Un calcul de chance de victoire en cours avance a chaque frame
+        if not self.idle_mode or self.pending_redraw or core.OUTCOME_CACHE.busy(): return 0
+        return self.scene.idle_timeout(current_time)
+
+    def wait_for_input(self, current_time):
+        timeout = self.idle_timeout(current_time)
+        if timeout == 0 or pygame.event.peek(): return None
+        event = pygame.event.wait(timeout) if timeout else pygame.event.wait()
+        return event if event.type != pygame.NOEVENT else None
+
+    def run(self):
+        while True:
+            events, pos = self.poll_input()
+            self.step(events, pos)
+            CLOCK.tick(60)
+
+    def poll_input(self):
+        # 0. VEILLE : sur un ecran statique, on bloque jusqu'a une entree ou un minuteur
+        woke_event = self.wait_for_input(pygame.time.get_ticks())
+        PROFILER.begin()  # le temps passe a dormir ne compte pas dans la frame
+
+        # 1. Gestion du MOUSE SCALING
+        # On récupère la taille réelle de la fenêtre
+        window_w, window_h = real_window.get_size()
+        
+        # On calcule le ratio (Echelle)
+        scale_x = window_w / GAME_WIDTH
+        scale_y = window_h / GAME_HEIGHT
+        
+        # Position brute de la souris sur l'écran
+        raw_mx, raw_my = pygame.mouse.get_pos()
+        
+        # Position convertie dans le jeu (800x600)
+        mouse_x = int(raw_mx / scale_x)
+        mouse_y = int(raw_my / scale_y)
+        pos = (mouse_x, mouse_y)
+        PROFILER.mark("mouse")
+        
+        events = pygame.event.get()
+        if woke_event: events.insert(0, woke_event)
+        PROFILER.mark("events")
+        return events, pos
+
+    # Une frame complete a partir d'evenements deja recuperes (pos en coordonnees jeu).
+    # Appelee par run() et, sans limite de FPS, par bench.py pour rejouer un script.
+    def step(self, events, pos):
+        current_time = self.current_time = pygame.time.get_ticks()
+        
+        # 2. EVENEMENTS : chaque evenement est route une seule fois vers la scene active
+        for event in events:
+            if event.type == pygame.QUIT: self.quit()
+            if event.type == pygame.VIDEORESIZE: SCALER.rebuild(real_window)
+            if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                RENDERER.invalidate()
+            
+            # IMPORTANT : On corrige la position de la souris dans l'événement
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                event.pos = pos
+            if event.type in (pygame.MOUSEMOTION, pygame.MOUSEWHEEL): self.hover_dirty = True
+
+            scene = self.scene
+            if event.type not in scene.event_types: continue
+            # Un seul bouton candidat par clic, trouve via l'index spatial de la scene
+            target = scene.hit_test(event)
+            if scene.has_settings and target is self.btn_settings:
+                self.open_settings()
+            else:
+                scene.handle_event(event, target)
+
+        # Le survol n'est recalcule que si la souris bouge, defile ou change d'ecran
+        if self.hover_dirty:
+            self.scene.update_hover(pos); self.hover_dirty = False
+        self.scene.update(current_time)
+        PROFILER.mark("logic")
+
+        # 3. DESSIN SUR LA SURFACE VIRTUELLE (game_surface) au lieu de l'écran direct
+        RENDERER.begin_frame()
+        RENDERER.blit(self.get_background(), (0, 0))
+        self.scene.draw(RENDERER)
+        if self.scene.has_settings: self.btn_settings.draw(RENDERER)
+        if PROFILER.enabled: PROFILER.draw(RENDERER)
+        # En mode rectangles sales, end_frame rejoue les appels de dessin : compte dans "draw"
+        dirty_rects = RENDERER.end_frame()
+        PROFILER.mark("draw")
+
+        # 4. UPSCALING FINAL (Le secret du plein écran propre)
+        self.present_frame(dirty_rects)
+        self.pending_redraw = False
+        PROFILER.end_frame()
+
+    def present_frame(self, dirty_rects):
+        # dirty_rects : None = mode normal (tout), [] = rien n'a change, sinon zones a pousser
+        if dirty_rects is None or dirty_rects == [RENDERER.screen_rect]:
+            SCALER.scale_full(real_window)
+            PROFILER.mark("scale")
+            pygame.display.flip()
+        elif dirty_rects:
+            updates = SCALER.scale_rects(real_window, dirty_rects)
+            PROFILER.mark("scale")
+            pygame.display.update(updates)
+        PROFILER.mark("flip")
+
+    def quit(self):
+        PROFILER.dump()
+        pygame.quit(); sys.exit()
+
+# --- SCENES ---
+# Chaque etat du jeu est une Scene : enter/exit a chaque changement d'etat,
+# handle_event pour les seuls types d'evenements declares dans event_types,
+# update pour la logique de la frame, draw pour le dynamique (le statique va
+# dans compose_background, mis en cache par Game.get_background).
+class Scene:
+    state = None
+    event_types = frozenset((pygame.MOUSEBUTTONDOWN,))
+    has_settings = False  # affiche le bouton [OPT] commun
+
+    def __init__(self, game):
+        self.game = game
+        self._hit_index = None
+        self.hovered = None
+
+    def buttons(self): return []
+
+    def hit_index(self):
+        if self._hit_index is None:
+            buttons = self.buttons() + ([self.game.btn_settings] if self.has_settings else [])
+            self._hit_index = HitGrid(buttons)
+        return self._hit_index
+
+    def invalidate_hit_index(self):
+        self._hit_index = None; self.game.hover_dirty = True
+
+    def hit_test(self, event):
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1: return None
+        btn = self.hit_index().find(event.pos)
+        return btn if btn is not None and not btn.disabled else None
+
+    def update_hover(self, pos):
+        btn = self.hit_index().find(pos)
+        if btn is not self.hovered:
+            if self.hovered: self.hovered.hover = False
+            self.hovered = btn
+        if btn and not btn.disabled: btn.hover = True
+
+    def enter(self): pass
+
+    def exit(self):
+        # Les boutons partages ([OPT], Retour Camp) ne doivent pas garder le survol
+        if self.hovered: self.hovered.hover = False
+        self.hovered = None
+
+    def refresh(self): pass
+    def handle_event(self, event, target): pass
+    def update(self, current_time): pass
+    def draw(self, canvas): pass
+    def background_key(self): return None
+    def compose_background(self, canvas): pass
+
+    # Par defaut une scene est statique : on dort jusqu'a la prochaine entree
+    def idle_timeout(self, current_time): return None
+
+class MenuScene(Scene):
+    state = "MENU"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.btn_new = Button("Nouvelle Partie", 300, 200, 200, 50, BLUE)
+        self.btn_load_menu = Button("Charger Partie", 300, 270, 200, 50, GREEN)
+        self.btn_quit = Button("Quitter", 300, 340, 200, 50, RED)
+
+    def buttons(self): return [self.btn_new, self.btn_load_menu, self.btn_quit]
+
+    def compose_background(self, canvas):
+        self.game.draw_text_centered("DONJON INFINI", FONT_TITLE, 100, GOLD, canvas)
+
+    def handle_event(self, event, target):
+        if target is self.btn_new: self.game.state = "INPUT_NAME"
+        elif target is self.btn_load_menu: self.game.state = "LOAD_MENU"
+        elif target is self.btn_quit: self.game.quit()
+
+    def draw(self, canvas):
+        for btn in self.buttons(): btn.draw(canvas)
+
+class SettingsScene(Scene):
+    state = "SETTINGS"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.btn_set_fs = Button("Plein Ecran : OFF", 250, 160, 300, 50, BLUE)
+        self.btn_set_dirty = Button("Rendu Partiel : OFF", 250, 220, 300, 50, BLUE)
+        self.btn_set_profiler = Button("Profileur : OFF", 250, 280, 300, 50, BLUE)
+        self.btn_set_menu = Button("Menu Principal", 250, 340, 300, 50, RED)
+        self.btn_set_back = Button("Retour au Jeu", 250, 400, 300, 50, GREEN)
+
+    def buttons(self): return [self.btn_set_fs, self.btn_set_dirty, self.btn_set_profiler, self.btn_set_menu, self.btn_set_back]
+
+    def compose_background(self, canvas):
+        self.game.draw_text_centered("PARAMETRES", FONT_TITLE, 100, WHITE, canvas)
+
+    def handle_event(self, event, target):
+        g = self.game
+        if target is self.btn_set_fs: g.toggle_fullscreen()
+        elif target is self.btn_set_dirty: g.toggle_dirty_rects()
+        elif target is self.btn_set_profiler: g.toggle_profiler()
+        elif target is self.btn_set_menu:
+            g.save_current_game()
+            g.state = "MENU"
+        elif target is self.btn_set_back: g.state = g.previous_state
+
+    def update(self, current_time):
+        self.btn_set_fs.text = "Plein Ecran : ON" if self.game.is_fullscreen else "Plein Ecran : OFF"
+        self.btn_set_dirty.text = "Rendu Partiel : ON" if RENDERER.dirty_mode else "Rendu Partiel : OFF"
+        self.btn_set_profiler.text = "Profileur : ON" if PROFILER.enabled else "Profileur : OFF"
+
+    def draw(self, canvas):
+        for btn in self.buttons(): btn.draw(canvas)
+
+class InputNameScene(Scene):
+    state = "INPUT_NAME"
+    event_types = frozenset((pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN))
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.input_text = ""
+        self.selected_class = "Guerrier"
+        self.class_buttons = [
+            Button("Guerrier", 150, 300, 150, 100, RED, "Guerrier"),
+            Button("Tank", 325, 300, 150, 100, GRAY, "Tank"),
+            Button("Mage", 500, 300, 150, 100, BLUE, "Mage")
+        ]
+        self.btn_confirm_name = Button("Lancer l'aventure", 300, 450, 200, 50, GREEN)
+
+    def buttons(self): return self.class_buttons + [self.btn_confirm_name]
+
+    def enter(self):
+        self.input_text = ""; self.selected_class = "Guerrier"
+
+    def compose_background(self, canvas):
+        g = self.game
+        g.draw_text_centered("Creation du Personnage", FONT_TITLE, 50, WHITE, canvas)
+        g.draw_text_centered("Nom du Heros :", FONT_TEXT, 120, WHITE, canvas)
+        canvas.rect(WHITE, (250, 140, 300, 40), 2)
+        g.draw_text_centered("Choisissez votre Classe :", FONT_TEXT, 250, WHITE, canvas)
+        for btn in self.class_buttons:
+            hp, atk, defense = CLASS_STATS[btn.data]
+            desc = f"PV:{hp} ATK:{atk} DEF:{defense}"
+            canvas.blit(render_text(FONT_SMALL, desc, WHITE), (btn.rect.x + 10, btn.rect.y + 110))
+
+    def handle_event(self, event, target):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_BACKSPACE: self.input_text = self.input_text[:-1]
+            elif len(self.input_text) < 15 and event.unicode.isalnum(): self.input_text += event.unicode
+        elif target in self.class_buttons: self.selected_class = target.data
+        elif target is self.btn_confirm_name and self.input_text:
+            g = self.game
+            g.player = core.new_hero(self.input_text, self.selected_class)
+            g.state = "CAMP"; g.save_current_game()
+
+    def update(self, current_time):
+        for btn in self.class_buttons: btn.selected = (btn.data == self.selected_class)
+
+    def draw(self, canvas):
+        canvas.blit(render_text(FONT_TEXT, self.input_text, WHITE), (260, 150))
+        for btn in self.class_buttons: btn.draw(canvas)
+        self.btn_confirm_name.draw(canvas)
+
+class LoadMenuScene(Scene):
+    state = "LOAD_MENU"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.save_files_buttons = []
+        self.btn_back_load = Button("Retour Menu", 300, 520, 200, 40, GRAY)
+
+    def buttons(self): return self.save_files_buttons + [self.btn_back_load]
+
+    def enter(self): self.refresh_save_list()
+
+    def refresh_save_list(self):
+        self.save_files_buttons = []
+        if os.path.exists(SAVES_DIR):
+            files = [f for f in os.listdir(SAVES_DIR) if f.endswith('.json')]
+            for i, filename in enumerate(files[:6]):
+                display_name = filename[:-5]
+                btn = Button(display_name, 200, 100 + (i * 60), 400, 50, GOLD, data=filename)
+                self.save_files_buttons.append(btn)
+        self.hovered = None
+        self.invalidate_hit_index()
+
+    def compose_background(self, canvas):
+        self.game.draw_text_centered("CHOIX DU PERSONNAGE", FONT_TITLE, 50, WHITE, canvas)
+
+    def handle_event(self, event, target):
+        g = self.game
+        if target is self.btn_back_load: g.state = "MENU"
+        elif target in self.save_files_buttons:
+            try:
+                with open(os.path.join(SAVES_DIR, target.data), 'r') as f:
+                    g.player = Character.from_dict(json.load(f))
+                g.state = "STATS_VIEW"
+            except Exception as e: print(e)
+
+    def draw(self, canvas):
+        for btn in self.buttons(): btn.draw(canvas)
+
+class StatsViewScene(Scene):
+    state = "STATS_VIEW"
+    has_settings = True
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.btn_resume = Button("Reprendre", 250, 430, 300, 50, GREEN)
+        self.btn_back_stats = Button("Choisir un autre", 250, 490, 300, 40, GRAY)
+        self.btn_delete = Button("[X] Mort Definitive", 550, 530, 180, 40, DARK_RED)
+
+    def buttons(self): return [self.btn_resume, self.btn_back_stats, self.btn_delete]
+
+    def compose_background(self, canvas):
+        canvas.rect(DARK_BLUE, (100, 80, 600, 380), border_radius=15)
+        canvas.rect(GOLD, (100, 80, 600, 380), 3, border_radius=15)
+        self.game.draw_text_centered("FICHE DU HERO", FONT_TITLE, 130, GOLD, canvas)
+
+    def handle_event(self, event, target):
+        g = self.game
+        if target is self.btn_resume: g.state = "CAMP"
+        elif target is self.btn_back_stats: g.state = "LOAD_MENU"
+        elif target is self.btn_delete:
+            g.delete_current_save(); g.player = None; g.state = "LOAD_MENU"
+
+    def draw(self, canvas):
+        p = self.game.player
+        self.game.draw_text_centered(f"{p.name} - {p.job_class}", FONT_SUBTITLE, 200)
+        canvas.blit(render_text(FONT_TEXT, f"[PV] Sante : {p.hp}/{p.max_hp}", WHITE), (250, 260))
+        canvas.blit(render_text(FONT_TEXT, f"[ATK] Attaque : {p.attack_value}", WHITE), (250, 300))
+        block_pct = min(60, p.defense_value * 2)
+        canvas.blit(render_text(FONT_TEXT, f"[DEF] Defense : {p.defense_value} ({block_pct}%)", WHITE), (250, 340))
+        canvas.blit(render_text(FONT_TEXT, f"[ETAGE] Etage : {p.floor}  |  [KILLS] : {p.kills}/10", ORANGE), (250, 380))
+        canvas.blit(render_text(FONT_TEXT, f"($) Or : {p.gold}", GOLD), (250, 420))
+        for btn in self.buttons(): btn.draw(canvas)
+
+# Ecrans a liste d'objets defilante (Sac, Equipement, Marchand)
+class ListScene(Scene):
+    event_types = frozenset((pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL))
+    has_settings = True
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.item_list = None  # VirtualList cree par chaque ecran
+
+    def buttons(self): return [self.game.btn_back_inv]
+
+    def enter(self): self.game.refresh_inventory_ui()
+
+    def handle_event(self, event, target):
+        g = self.game
+        if event.type == pygame.MOUSEWHEEL:
+            g.inv_scroll_y += event.y * 30
+            if g.inv_scroll_y > 0: g.inv_scroll_y = 0
+        elif target is g.btn_back_inv:
+            g.state = "CAMP"; g.inv_scroll_y = 0
+        else:
+            btn = self.item_list.clicked(event, g.inv_scroll_y)
+            if btn: self.on_item_clicked(btn)
+            else: self.on_click(target)
+
+    def on_item_clicked(self, btn): pass
+    def on_click(self, target): pass
+
+    def update_hover(self, pos):
+        super().update_hover(pos)
+        self.item_list.update_hover(pos, self.game.inv_scroll_y)
+
+class InventoryScene(ListScene):
+    state = "INVENTORY"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.item_list = VirtualList(50, 100, 220, 80, 3, 240, 100, (0, 100, GAME_WIDTH, 420), self.bind_button)
+        # Selection multiple : les clics cochent des piles, puis une action s'applique en un lot
+        self.selecting = False
+        self.selected = set()  # poignees des piles cochees
+        self.btn_select = Button("Selection", 20, 530, 130, 40, GRAY)
+        self.btn_select_all = Button("Tout", 160, 530, 110, 40, GRAY)
+        self.btn_use = Button("Utiliser", 510, 530, 90, 40, BLUE)
+        self.btn_sell = Button("Vendre", 605, 530, 90, 40, GOLD)
+        self.btn_discard = Button("Jeter", 700, 530, 90, 40, RED)
+        self.actions = {self.btn_use: "use", self.btn_sell: "sell", self.btn_discard: "discard"}
+
+    def buttons(self):
+        buttons = [self.game.btn_back_inv, self.btn_select]
+        if self.selecting: buttons += [self.btn_select_all] + list(self.actions)
+        return buttons
+
+    def bind_button(self, btn, stack):
+        btn.text = stack.label(); btn.data = stack
+        btn.color = BLUE if stack.item.cat == "consommable" else PURPLE
+        btn.selected = stack.handle in self.selected
+
+    def set_selecting(self, selecting):
+        self.selecting = selecting; self.selected.clear()
+        self.btn_select.text = "Annuler" if selecting else "Selection"
+        for btn in self.item_list.live.values(): btn.selected = False
+        self.invalidate_hit_index()
+
+    def exit(self):
+        super().exit()
+        if self.selecting: self.set_selecting(False)
+
+    def selection_value(self):
+        inv = self.game.player.inventory
+        return sum(sell_price(stack.item) * stack.qty for stack in map(inv.get, self.selected) if stack)
+
+    def commit_selection(self, kind):
+        g = self.game; inv = g.player.inventory
+        batch = g.player.batch()
+        for handle in sorted(self.selected):
+            stack = inv.get(handle)
+            if stack is None: continue
+            if kind == "sell": batch.sell(handle)
+            elif kind == "discard": batch.discard(handle)
+            elif stack.item.cat == "consommable": batch.use(handle, stack.qty)
+        if not len(batch):
+            g.add_log("Aucun consommable selectionne"); return
+        # Lot applique : l'interface est reconstruite sans selection ; lot refuse : la selection reste
+        selected = set(self.selected); self.selected.clear()
+        if not g.commit_batch(batch): self.selected = selected
+
+    def refresh(self):
+        if self.game.player:
+            self.item_list.set_entries(list(self.game.player.inventory))
+
+    def compose_background(self, canvas):
+        self.game.draw_text_centered("SAC A DOS", FONT_TITLE, 50, PURPLE, canvas)
+        canvas.rect(GRAY, (780, 100, 10, 420))
+
+    def on_item_clicked(self, btn):
+        g = self.game
+        stack = btn.data
+        if self.selecting:
+            if stack.handle in self.selected: self.selected.discard(stack.handle)
+            else: self.selected.add(stack.handle)
+            btn.selected = stack.handle in self.selected
+        elif stack.item.cat == "consommable":
+            g.commit_batch(g.player.batch().use(stack.handle))
+        else:
+            g.add_log("C'est un equipement, allez dans le menu EQUIP.")
+
+    def on_click(self, target):
+        if target is self.btn_select: self.set_selecting(not self.selecting)
+        elif target is self.btn_select_all:
+            self.selected = {stack.handle for stack in self.item_list.entries}
+            for btn in self.item_list.live.values(): btn.selected = True
+        elif target in self.actions: self.commit_selection(self.actions[target])
+
+    def update(self, current_time):
+        for btn in self.actions: btn.disabled = not self.selected
+
+    def draw(self, canvas):
+        g = self.game
+        if self.selecting:
+            g.draw_text_centered(f"($) Or: {g.player.gold} | {len(self.selected)} pile(s), vente {self.selection_value()} $", FONT_TEXT, 90, GOLD)
+        else: g.draw_text_centered(f"($) Or: {g.player.gold}", FONT_TEXT, 90, GOLD)
+        
+        canvas.set_clip(self.item_list.viewport)
+        for btn in self.item_list.visible_buttons(g.inv_scroll_y):
+            btn.draw(canvas, g.inv_scroll_y)
+            if btn.hover:
+                 desc_txt = render_text(FONT_SMALL, btn.data.item.desc, GOLD)
+                 canvas.blit(desc_txt, (btn.rect.x, btn.rect.y + 55 + g.inv_scroll_y))
+        canvas.set_clip(None)
+        
+        canvas.rect(WHITE, (780, 100 - (g.inv_scroll_y / 5), 10, 30))
+        for btn in self.buttons(): btn.draw(canvas)
+
+class EquipScene(ListScene):
+    state = "EQUIP_MENU"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.item_list = VirtualList(50, 120, 160, 50, 1, 160, 60, (0, 100, 250, 420), self.bind_button)
+        self.equip_slots_buttons = {
+            "head": Button("Tete", 350, 150, 100, 60, DARK_BLUE, "head"),
+            "chest": Button("Plastron", 350, 220, 100, 60, DARK_BLUE, "chest"),
+            "legs": Button("Jambes", 350, 290, 100, 60, DARK_BLUE, "legs"),
+            "feet": Button("Pieds", 350, 360, 100, 60, DARK_BLUE, "feet"),
+            "weapon": Button("Arme", 230, 220, 100, 60, RED, "weapon"),
+            "ring": Button("Bague", 470, 220, 100, 60, GOLD, "ring")
+        }
+        self.objective = "atk"
+        self.btn_objective = Button("", 600, 150, 180, 50, BLUE)
+        self.btn_auto = Button("Auto-Equiper", 600, 210, 180, 50, GREEN)
+
+    def buttons(self):
+        return list(self.equip_slots_buttons.values()) + [self.btn_objective, self.btn_auto, self.game.btn_back_inv]
+
+    def bind_button(self, btn, stack):
+        btn.text = stack.label(); btn.data = stack; btn.color = PURPLE
+
+    def refresh(self):
+        if self.game.player:
+            self.item_list.set_entries(self.game.player.inventory.category("equipment"))
+
+    def compose_background(self, canvas):
+        self.game.draw_text_centered("EQUIPEMENT DU HERO", FONT_TITLE, 50, GOLD, canvas)
+
+    def on_item_clicked(self, btn):
+        g = self.game
+        msg = g.player.equip_item(btn.data.handle)
+        g.add_log(msg)
+        g.refresh_inventory_ui()
+        g.save_current_game()
+
+    def on_click(self, target):
+        if target is self.btn_objective:
+            objectives = list(LOADOUT_OBJECTIVES)
+            self.objective = objectives[(objectives.index(self.objective) + 1) % len(objectives)]
+        elif target is self.btn_auto:
+            g = self.game
+            loadout, _ = best_loadout(g.player, self.objective)
+            g.add_log(f"Auto-equipement ({LOADOUT_OBJECTIVES[self.objective]})")
+            g.commit_batch(g.player.batch().equip_set(loadout))
+        elif target is not None and target.data in self.equip_slots_buttons:
+            g = self.game
+            msg = g.player.unequip_item(target.data)
+            g.add_log(msg)
+            g.refresh_inventory_ui()
+            g.save_current_game()
+
+    def update(self, current_time):
+        self.btn_objective.text = f"But : {LOADOUT_OBJECTIVES[self.objective]}"
+        for slot_name, btn in self.equip_slots_buttons.items():
+            equipped_item = self.game.player.equipment.get(slot_name)
+            if equipped_item:
+                d_text = equipped_item.name
+                if len(d_text) > 10: d_text = d_text[:8] + ".."
+                btn.text = d_text
+                btn.color = GREEN
+            else:
+                btn.text = slot_name.upper()
+                btn.color = DARK_BLUE
+
+    def draw(self, canvas):
+        g = self.game
+        canvas.set_clip(self.item_list.viewport)
+        if not self.item_list.entries:
+            canvas.blit(render_text(FONT_SMALL, "Pas d'equipement...", GRAY), (50, 120 + g.inv_scroll_y))
+        
+        for btn in self.item_list.visible_buttons(g.inv_scroll_y):
+            btn.draw(canvas, g.inv_scroll_y)
+            if btn.hover:
+                canvas.blit(render_text(FONT_SMALL, btn.data.item.desc, GOLD), (btn.rect.right + 10, btn.rect.y + 15 + g.inv_scroll_y))
+        canvas.set_clip(None)
+
+        for btn in self.equip_slots_buttons.values(): btn.draw(canvas)
+        self.btn_objective.draw(canvas); self.btn_auto.draw(canvas)
+        g.btn_back_inv.draw(canvas)
+
+class MerchantScene(ListScene):
+    state = "MERCHANT"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.item_list = VirtualList(50, 100, 220, 80, 3, 240, 100, (0, 120, GAME_WIDTH, 400), self.bind_button)
+
+    def bind_button(self, btn, item):
+        price = item.price
+        can_afford = self.game.player.gold >= price
+        btn.text = f"{item.name} ({price} $)"; btn.data = item
+        btn.color = CYAN if can_afford else GRAY
+        btn.disabled = not can_afford
+
+    def refresh(self):
+        g = self.game
+        if g.player:
+            g.generate_shop()
+            self.item_list.set_entries(list(g.shop_items))
+
+    def compose_background(self, canvas):
+        self.game.draw_text_centered("MARCHAND ITINERANT", FONT_TITLE, 50, CYAN, canvas)
+
+    def on_item_clicked(self, btn):
+        g = self.game
+        bought, msg = core.buy_item(g.player, btn.data)
+        g.add_log(msg)
+        if bought:
+            g.refresh_inventory_ui()
+            g.save_current_game()
+
+    def draw(self, canvas):
+        g = self.game
+        g.draw_text_centered(f"Votre Or: {g.player.gold} ($)", FONT_SUBTITLE, 90, GOLD)
+        
+        canvas.set_clip(self.item_list.viewport)
+        for btn in self.item_list.visible_buttons(g.inv_scroll_y):
+            btn.draw(canvas, g.inv_scroll_y)
+            if btn.hover:
+                 item = btn.data
+                 desc_txt = render_text(FONT_SMALL, item.desc + f" (Prix: {item.price})", WHITE)
+                 canvas.blit(desc_txt, (btn.rect.x, btn.rect.y + 60 + g.inv_scroll_y))
+        canvas.set_clip(None)
+
+        g.btn_back_inv.draw(canvas)
+
+class CampScene(Scene):
+    state = "CAMP"
+    has_settings = True
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.btn_explore = Button("Explorer (Combat)", 50, 450, 200, 50, RED)
+        self.btn_rest = Button("Se Reposer (+10PV)", 270, 450, 220, 50, GREEN)
+        self.btn_inventory = Button("Sac a Dos", 270, 380, 150, 50, PURPLE)
+        self.btn_equip_menu = Button("EQUIP", 430, 380, 60, 50, GOLD)
+        self.btn_merchant = Button("Marchand ($)", 600, 380, 150, 50, CYAN)
+        self.btn_save = Button("Sauvegarder", 510, 450, 200, 50, BLUE)
+        self.win_chance = None
+
+    def buttons(self):
+        return [self.btn_explore, self.btn_rest, self.btn_inventory, self.btn_save, self.btn_equip_menu, self.btn_merchant]
+
+    def compose_background(self, canvas):
+        canvas.rect(GRAY, (250, 190, 300, 20))
+        self.game.draw_log_panel(canvas)
+
+    def handle_event(self, event, target):
+        g = self.game
+        if target is self.btn_explore:
+            g.spawn_enemy(); g.state = "COMBAT"
+        elif target is self.btn_rest:
+            g.add_log(g.player.heal(10)); g.next_rest_time = g.current_time + 60000
+        elif target is self.btn_save: g.save_current_game()
+        elif target is self.btn_inventory: g.state = "INVENTORY"
+        elif target is self.btn_equip_menu: g.state = "EQUIP_MENU"
+        elif target is self.btn_merchant: g.state = "MERCHANT"
+
+    def update(self, current_time):
+        self.win_chance = core.OUTCOME_CACHE.win_chance(self.game.player)
+        time_left = self.game.next_rest_time - current_time
+        if time_left > 0: self.btn_rest.text = f"Repos ({time_left//1000}s)"; self.btn_rest.disabled = True
+        else: self.btn_rest.text = "Se Reposer (+10PV)"; self.btn_rest.disabled = False
+
+    def idle_timeout(self, current_time):
+        # Le compte a rebours du repos change d'affichage a chaque seconde
+        time_left = self.game.next_rest_time - current_time
+        if time_left > 0: return time_left % 1000 + 1
+        return None
+
+    def draw(self, canvas):
+        g = self.game; p = g.player
+        g.draw_text_centered(f"ETAGE {p.floor}", FONT_TITLE, 80)
+        g.draw_text_centered(f"{p.name} (PV: {p.hp}/{p.max_hp})", FONT_SUBTITLE, 140, GREEN)
+        g.draw_text_centered(f"($) Or: {p.gold}", FONT_TEXT, 170, GOLD)
+        
+        prog = min(1.0, p.kills / 10)
+        canvas.rect(ORANGE, (250, 190, 300 * prog, 20))
+        canvas.blit(render_text(FONT_SMALL, f"Boss: {p.kills}/10", WHITE), (350, 192))
+        draw_win_chance(canvas, self.win_chance, "Victoire (Boss)" if p.kills >= 10 else "Victoire", (150, 428), centered=True)
+
+        for btn in self.buttons(): btn.draw(canvas)
+        g.draw_logs()
+
+class CombatScene(Scene):
+    state = "COMBAT"
+    has_settings = True
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.btn_attack = Button("ATTAQUER", 200, 450, 200, 60, RED)
+        self.btn_flee = Button("FUIR >>", 420, 450, 180, 60, ORANGE)
+        self.win_chance = None
+
+    def buttons(self): return [self.btn_attack, self.btn_flee]
+
+    def background_key(self):
+        return self.game.enemy.is_boss if self.game.enemy else None
+
+    def compose_background(self, canvas):
+        g = self.game
+        g.draw_text_centered("COMBAT", FONT_TITLE, 50, RED, canvas)
+        canvas.rect(BLUE, (100, 150, 200, 200), border_radius=10)
+        col_enn = GOLD if g.enemy and g.enemy.is_boss else GRAY
+        canvas.rect(col_enn, (500, 150, 200, 200), border_radius=10)
+        g.draw_log_panel(canvas)
+
+    def handle_event(self, event, target):
+        g = self.game
+        if target is self.btn_attack: msgs, outcome = core.attack_round(g.player, g.enemy)
+        elif target is self.btn_flee: msgs, outcome = core.flee(g.player, g.enemy)
+        else: return
+        for msg in msgs: g.add_log(msg)
+        if outcome == "win": g.state = "CAMP"; g.save_current_game()
+        elif outcome == "fled": g.state = "CAMP"
+        elif outcome == "lose": g.state = "MENU"
+
+    def update(self, current_time):
+        self.win_chance = core.OUTCOME_CACHE.win_chance(self.game.player, self.game.enemy)
+
+    def draw(self, canvas):
+        g = self.game
+        g.draw_text_centered(g.player.name, FONT_TEXT, 130)
+        canvas.blit(render_text(FONT_TEXT, f"PV: {g.player.hp}", WHITE), (150, 230))
+        
+        canvas.blit(render_text(FONT_TEXT, g.enemy.name, WHITE), (530, 120))
+        canvas.blit(render_text(FONT_TEXT, f"PV: {g.enemy.hp}", WHITE), (550, 230))
+        draw_win_chance(canvas, self.win_chance, "Chance de victoire", (400, 390), centered=True)
+
+        for btn in self.buttons(): btn.draw(canvas)
+        g.draw_logs()
+
+if __name__ == "__main__":
+    game = Game()
+    game.run()
@@ -0,0 +1,119 @@
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+import core
+
+# --- SIMULATEUR DE COMBATS (NumPy) ---
+# Resout des millions de combats heros contre monstre en parallele, un tour a la fois,
+# avec les regles de core : le heros frappe (10% de critique x2, le monstre pare avec
+# randint(0, 100) < min(60, def * 2) et divise les degats par 2), puis le monstre
+# encore debout riposte (sans critique, meme parade cote heros). Chaque tour ne
+# traite que les combats encore en cours.
+# Usage : python simulation.py [--class Guerrier] [--floor 1] [--boss] [--fights 1000000]
+# Critique (core.CRIT_CHANCE), parade (core.block_threshold) et limite de tours
+# (core.MAX_TURNS, combats encore indecis comptes comme perdus) viennent de core.
+
+def block_thresholds(defense):
+    # core.block_threshold pour chaque combat, calcule une fois par defense distincte
+    values, inverse = np.unique(defense, return_inverse=True)
+    return np.array([core.block_threshold(int(v)) for v in values], dtype=np.int64)[inverse]
+
+def hit(rng, dmg, defense, threshold):
+    # take_damage vectorise : reduction par DEF // 2 puis parade eventuelle
+    reduced = np.maximum(0, dmg - (defense // 2))
+    blocked = rng.integers(0, 101, size=reduced.shape) < threshold
+    return np.where(blocked, reduced // 2, reduced)
+
+def simulate_fights(hero_hp, hero_atk, hero_def, enemy_hp, enemy_atk, enemy_def,
+                    fights=None, seed=None, max_turns=core.MAX_TURNS):
+    # Stats : scalaires ou tableaux (diffuses sur `fights` combats)
+    # -> {"won", "turns", "hero_hp", "enemy_hp"} : un tableau par combat ; turns = attaques du heros
+    stats = np.broadcast_arrays(*(np.asarray(v, dtype=np.int64) for v in
+                                  (hero_hp, hero_atk, hero_def, enemy_hp, enemy_atk, enemy_def)))
+    n = fights if fights is not None else stats[0].size
+    h_hp, h_atk, h_def, e_hp, e_atk, e_def = (np.broadcast_to(v, (n,)).copy() for v in stats)
+    rng = np.random.default_rng(seed)
+    h_block, e_block = block_thresholds(h_def), block_thresholds(e_def)
+
+    won = np.zeros(n, dtype=bool)
+    turns = np.zeros(n, dtype=np.int64)
+    active = np.arange(n)
+    for _ in range(max_turns):
+        if active.size == 0: break
+        turns[active] += 1
+        crit = np.where(rng.random(active.size) < core.CRIT_CHANCE, 2, 1)
+        e_hp[active] -= hit(rng, h_atk[active] * crit, e_def[active], e_block[active])
+        killed = e_hp[active] <= 0
+        won[active[killed]] = True
+        active = active[~killed]
+
+        h_hp[active] -= hit(rng, e_atk[active], h_def[active], h_block[active])
+        active = active[h_hp[active] > 0]
+    return {"won": won, "turns": turns, "hero_hp": h_hp, "enemy_hp": e_hp}
+
+def floor_enemy_arrays(floor, n, boss=False, seed=None):
+    # Monstres tires comme core.spawn_enemy (type au hasard, facteur +/- 20%) -> (PV, ATK, DEF)
+    if boss:
+        _, hp, atk, defense = core.FLOOR_TABLE.boss(floor)
+        return np.full(n, hp), np.full(n, atk), np.full(n, defense)
+    rng = np.random.default_rng(seed)
+    templates = np.array([t[1:] for t in core.FLOOR_TABLE.monsters(floor)])
+    picked = templates[rng.integers(0, len(templates), size=n)]
+    factor = rng.uniform(0.8, 1.2, size=n)[:, None]
+    stats = (picked * factor).astype(np.int64)
+    return stats[:, 0], stats[:, 1], stats[:, 2]
+
+def distribution(values):
+    # Histogramme compact {valeur: part des combats}, plus quelques reperes
+    if values.size == 0: return {"mean": None, "p50": None, "p90": None, "histogram": {}}
+    counts = np.bincount(values - values.min())
+    hist = {int(v): round(c / values.size, 6) for v, c in enumerate(counts, values.min()) if c}
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": int(np.percentile(values, 50)),
+        "p90": int(np.percentile(values, 90)),
+        "histogram": hist,
+    }
+
+def summarize(result):
+    won = result["won"]
+    return {
+        "fights": int(won.size),
+        "win_rate": round(float(won.mean()), 6),
+        "turns_to_kill": distribution(result["turns"][won]),
+        "hp_left": distribution(result["hero_hp"][won]),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo vectorise des combats de jeu20")
+    parser.add_argument("--class", dest="job_class", default="Guerrier", choices=list(core.CLASS_STATS))
+    parser.add_argument("--floor", type=int, default=1)
+    parser.add_argument("--boss", action="store_true", help="combat contre le boss de l'etage")
+    parser.add_argument("--fights", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="ecrit le JSON dans ce fichier (sinon sortie standard)")
+    args = parser.parse_args(argv)
+
+    hero = core.new_hero("Sim", args.job_class)
+    enemies = floor_enemy_arrays(args.floor, args.fights, args.boss, args.seed)
+    t0 = time.perf_counter()
+    result = simulate_fights(hero.hp, hero.attack_value, hero.defense_value, *enemies,
+                             fights=args.fights, seed=args.seed + 1)
+    report = {"job_class": args.job_class, "floor": args.floor, "boss": args.boss,
+              "seconds": round(time.perf_counter() - t0, 3), **summarize(result)}
+    if args.boss:
+        # Boss aux stats fixes : comparaison avec le calcul exact de core.fight_odds
+        exact = core.fight_odds(hero.hp, hero.attack_value, hero.defense_value, *core.FLOOR_TABLE.boss(args.floor)[1:])
+        report["exact"] = {k: round(v, 6) if v is not None else None for k, v in exact.items()}
+    text = json.dumps(report, indent=4)
+    if args.out:
+        with open(args.out, 'w') as f: f.write(text)
+    else: print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
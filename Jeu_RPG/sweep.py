@@ -0,0 +1,134 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import core
+
+# --- BALAYAGE D'EQUILIBRAGE ---
+# Calcule, pour chaque classe x etage x combinaison d'equipement, les chances
+# exactes (core.fight_odds) contre les monstres de l'etage et contre le boss.
+# Le travail est decoupe en paquets (une classe, un etage, une tranche de
+# combinaisons) repartis sur un ProcessPoolExecutor ; le processus principal
+# ecrit les lignes en CSV au fil de l'eau. Le point de reprise (<out>.checkpoint)
+# retient les paquets finis et la taille du CSV : apres une interruption, la
+# meme commande reprend la ou elle s'etait arretee.
+# Usage : python sweep.py [--floors 10] [--workers 4] [--chunk 256] [--out sweep.csv]
+SLOTS = ("weapon", "head", "chest", "legs", "feet", "ring")
+COLUMNS = (["job_class", "floor"] + list(SLOTS) + ["hp", "atk", "def",
+           "win_monsters", "turns_monsters", "hp_loss_monsters", "win_boss", "turns_boss", "hp_loss_boss"])
+
+def build_loadouts():
+    # Toutes les combinaisons (rien ou un objet par emplacement), dans un ordre fixe
+    gear = [item for item in core.POSSIBLE_EQUIPMENT + core.MERCHANT_GEAR + core.BOSS_LOOT if item["cat"] == "equipment"]
+    choices = [[None] + [core.new_item(item) for item in gear if item["slot"] == slot] for slot in SLOTS]
+    return list(product(*choices))
+
+LOADOUTS = build_loadouts()
+
+def make_chunks(classes, floors, chunk_size):
+    # -> [(id, classe, etage, debut, fin)] ; les ids ne dependent que des parametres
+    chunks = []
+    for job_class, floor in product(classes, floors):
+        for start in range(0, len(LOADOUTS), chunk_size):
+            chunks.append((len(chunks), job_class, floor, start, min(start + chunk_size, len(LOADOUTS))))
+    return chunks
+
+def average_odds(hero, enemies):
+    total = {"win_rate": 0.0, "turns": 0.0, "hp_loss": 0.0}
+    for enemy in enemies:
+        odds = core.fight_odds(*hero, *enemy)
+        for k in total: total[k] += odds[k]
+    return [round(v / len(enemies), 6) for v in total.values()]
+
+def run_chunk(chunk):
+    # Execute dans un processus du pool -> (id, lignes du CSV)
+    chunk_id, job_class, floor, start, stop = chunk
+    monsters = core.next_opponents(floor, boss=False)
+    boss = core.next_opponents(floor, boss=True)
+    hero = core.new_hero("Sweep", job_class)
+    seen = {}  # beaucoup de combinaisons donnent les memes stats
+    rows = []
+    for loadout in LOADOUTS[start:stop]:
+        for slot, item in zip(SLOTS, loadout): hero.equipment[slot] = item
+        hero.invalidate_stats()
+        stats = (hero.max_hp, hero.attack_value, hero.defense_value)
+        odds = seen.get(stats)
+        if odds is None: odds = seen[stats] = average_odds(stats, monsters) + average_odds(stats, boss)
+        rows.append([job_class, floor] + [item.name if item else "" for item in loadout] + list(stats) + odds)
+    return chunk_id, rows
+
+# --- POINT DE REPRISE ---
+def load_checkpoint(path, out, params):
+    # -> (paquets finis, taille du CSV a garder) ; sans CSV utilisable, on repart de zero
+    if not os.path.exists(path): return set(), 0
+    with open(path, 'r') as f: data = json.load(f)
+    if data["params"] != params:
+        raise SystemExit(f"{path} vient d'un balayage aux parametres differents : supprimez-le ou changez --out")
+    if not os.path.exists(out) or os.path.getsize(out) < data["bytes"]:
+        print(f"{out} absent ou tronque : point de reprise ignore", file=sys.stderr)
+        os.remove(path)
+        return set(), 0
+    return set(data["done"]), data["bytes"]
+
+def save_checkpoint(path, params, done, size):
+    # Ecriture atomique : un arret pendant l'ecriture garde l'ancien point de reprise
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f: json.dump({"params": params, "done": sorted(done), "bytes": size}, f)
+    os.replace(tmp, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Balayage classes x etages x equipements (chances exactes)")
+    parser.add_argument("--classes", nargs="+", default=list(core.CLASS_STATS), choices=list(core.CLASS_STATS))
+    parser.add_argument("--floors", type=int, default=10, help="etages 1..N")
+    parser.add_argument("--chunk", type=int, default=256, help="combinaisons par paquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processus (defaut : un par coeur)")
+    parser.add_argument("--out", default="sweep.csv")
+    args = parser.parse_args(argv)
+
+    params = {"classes": args.classes, "floors": args.floors, "chunk": args.chunk, "loadouts": len(LOADOUTS)}
+    checkpoint = args.out + ".checkpoint"
+    done, size = load_checkpoint(checkpoint, args.out, params)
+    chunks = [c for c in make_chunks(args.classes, range(1, args.floors + 1), args.chunk) if c[0] not in done]
+    total = len(done) + len(chunks)
+
+    t0 = time.perf_counter()
+    rows_written = 0
+    # Reprise : les lignes ecrites apres le dernier point de reprise sont retirees
+    with open(args.out, 'r+' if done else 'w', newline='') as f:
+        f.truncate(size); f.seek(size)
+        writer = csv.writer(f)
+        if not done:
+            writer.writerow(COLUMNS)
+            f.flush(); size = f.tell()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            # Au plus quelques paquets en attente par processus : memoire bornee, ecriture au fil de l'eau
+            pending = set(); queue = iter(chunks)
+            for chunk in queue:
+                pending.add(pool.submit(run_chunk, chunk))
+                if len(pending) >= args.workers * 4: break
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    chunk_id, rows = future.result()
+                    writer.writerows(rows)
+                    f.flush(); size = f.tell()
+                    done.add(chunk_id); rows_written += len(rows)
+                    save_checkpoint(checkpoint, params, done, size)
+                    print(f"\r{len(done)}/{total} paquets", end="", file=sys.stderr, flush=True)
+                    chunk = next(queue, None)
+                    if chunk is not None: pending.add(pool.submit(run_chunk, chunk))
+
+    elapsed = time.perf_counter() - t0
+    print(file=sys.stderr)
+    print(json.dumps({"out": args.out, "rows": rows_written, "chunks": len(chunks), "resumed_chunks": total - len(chunks),
+                      "workers": args.workers, "seconds": round(elapsed, 3),
+                      "rows_per_second": round(rows_written / elapsed, 1) if elapsed else None}, indent=4))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())